@@ -0,0 +1,163 @@
+"""
+Times every proof stage on synthetic archives against the local stand-in server and
+records the peak traced memory of each stage.
+
+    python -m benchmarks.bench_proof --sizes 1000,10000,100000,1000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+import typing as T
+from dataclasses import asdict, dataclass
+
+os.environ.setdefault("VOLARA_API_KEY", "benchmark")
+
+from benchmarks.synthetic import ARCHIVE_FORMATS, SYNTHETIC_TEXT, write_archive
+from volara_proof.aio import run_sync
+from volara_proof.extract import extract_data
+from volara_proof.models.proof_config import ProofConfig
+from volara_proof.models.proof_response import ProofResponse
+from volara_proof.proofs import proof_of_quality
+from volara_proof.proofs.proof import proof
+from volara_proof.proofs.tweet_table import build_tweet_table
+from volara_proof.scraper.VolaraScraper import VolaraScraper
+from benchmarks.standin import StandInConfig, start_standin
+from volara_proof.storage.client import get_api_client
+
+BENCH_COOKIES = {"ct0": "benchmark", "auth_token": "benchmark"}
+
+
+@dataclass
+class StageResult:
+    size: int
+    archive_format: str
+    stage: str
+    seconds: float = 0.0
+    peak_bytes: int = 0
+    error: T.Optional[str] = None
+
+
+def measure(fn: T.Callable[[], T.Any], repeat: int) -> tuple[float, int]:
+    """Best wall time over `repeat` runs, then the peak of one traced run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def bench_archive(
+    path: str, size: int, archive_format: str, config: ProofConfig, repeat: int
+) -> list[StageResult]:
+    # Each stage works on what the previous ones left in `state`
+    state: dict[str, T.Any] = {}
+
+    def extract() -> None:
+        state["tweets_data"] = extract_data(path)
+
+    def no_duplicates() -> None:
+        state["tweet_table"] = build_tweet_table(state["tweets_data"])
+        assert proof_of_quality._no_duplicates(state["tweet_table"])
+
+    def unique_tweets() -> None:
+        run_sync(proof_of_quality._unique_tweets(state["tweet_table"], config.file_id))
+
+    def validate_tweets() -> None:
+        assert run_sync(proof_of_quality._validate_tweets(state["tweet_table"], config))
+
+    def score_tweets() -> None:
+        proof_of_quality._score_tweets(state["tweet_table"])
+
+    def full_proof() -> None:
+        assert proof(path, ProofResponse(dlp_id=config.dlp_id), config).valid
+
+    stages = [
+        ("extract_data", extract),
+        ("_no_duplicates", no_duplicates),
+        ("_unique_tweets", unique_tweets),
+        ("_validate_tweets", validate_tweets),
+        ("_score_tweets", score_tweets),
+        ("proof", full_proof),
+    ]
+    results = []
+    failed = False
+    for stage, fn in stages:
+        result = StageResult(size=size, archive_format=archive_format, stage=stage)
+        if failed and stage != "proof":
+            result.error = "skipped"
+        else:
+            try:
+                result.seconds, result.peak_bytes = measure(fn, repeat)
+            except Exception as e:
+                result.error = repr(e)
+                failed = True
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--formats", default=",".join(ARCHIVE_FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--workdir",
+        default=os.path.join(tempfile.gettempdir(), "volara-proof-bench"),
+        help="Where synthetic archives are generated and reused",
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    standin = start_standin(StandInConfig(tweet_text=SYNTHETIC_TEXT))
+    get_api_client().base_url = standin.url
+    scraper = VolaraScraper(cookies=BENCH_COOKIES, api_url=standin.url)
+    proof_of_quality.get_scraper = lambda config: scraper
+    config = ProofConfig(
+        input_dir=args.workdir,
+        cookies=json.dumps(BENCH_COOKIES),
+        dlp_id=6,
+        volara_api_key="benchmark",
+        file_id="benchmark",
+        miner_address="0x0",
+    )
+
+    results: list[StageResult] = []
+    print(f"{'size':>9} {'format':<11} {'stage':<17} {'seconds':>10} {'peak MiB':>9}")
+    for size in map(int, args.sizes.split(",")):
+        for archive_format in args.formats.split(","):
+            path = write_archive(args.workdir, size, archive_format)
+            for result in bench_archive(path, size, archive_format, config, args.repeat):
+                results.append(result)
+                if result.error:
+                    print(f"{size:>9} {archive_format:<11} {result.stage:<17} {result.error}")
+                    continue
+                print(
+                    f"{size:>9} {archive_format:<11} {result.stage:<17} "
+                    f"{result.seconds:>10.4f} {result.peak_bytes / 2**20:>9.1f}"
+                )
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"max RSS: {max_rss:.1f} MiB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"max_rss_mib": max_rss, "stages": [asdict(r) for r in results]},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Load test of the whole proof container entrypoint. Runs `python -m
+volara_proof` against the local stand-in server at a given concurrency and
+reports throughput and latency percentiles of the runs.
+
+    python -m benchmarks.bench_run --size 10000 --runs 40 --concurrency 8 \
+        --latency-ms 40 --latency-jitter-ms 60 --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import SYNTHETIC_TEXT, write_archive
+from volara_proof.constants import (
+    VOLARA_DLP_OWNER_ADDRESS,
+    VOLARA_DLP_OWNER_PUBLIC_KEY_HEX,
+)
+from benchmarks.standin import StandInConfig, start_standin
+
+BENCH_COOKIES = {"ct0": "benchmark", "auth_token": "benchmark"}
+
+
+def run_once(archive: str, run_dir: str, env: dict[str, str]) -> tuple[float, bool]:
+    """Proves the archive in a fresh process, returns its wall time and success."""
+    input_dir = os.path.join(run_dir, "input")
+    output_dir = os.path.join(run_dir, "output")
+    os.makedirs(input_dir)
+    os.makedirs(output_dir)
+    os.symlink(archive, os.path.join(input_dir, os.path.basename(archive)))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "volara_proof"],
+        env=env | {"INPUT_DIR": input_dir, "OUTPUT_DIR": output_dir},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        return seconds, False
+    with open(os.path.join(output_dir, "results.json")) as f:
+        return seconds, json.load(f)["valid"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--duplicate-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument(
+        "--workdir",
+        default=os.path.join(tempfile.gettempdir(), "volara-proof-bench"),
+        help="Where synthetic archives are generated and reused",
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    standin = start_standin(
+        StandInConfig(
+            latency_ms=args.latency_ms,
+            latency_jitter_ms=args.latency_jitter_ms,
+            error_rate=args.error_rate,
+            duplicate_rate=args.duplicate_rate,
+            rate_limit=args.rate_limit,
+            tweet_text=SYNTHETIC_TEXT,
+        )
+    )
+    archive = os.path.abspath(write_archive(args.workdir, args.size, "zip"))
+    permissions = [
+        {
+            "address": VOLARA_DLP_OWNER_ADDRESS,
+            "public_key": VOLARA_DLP_OWNER_PUBLIC_KEY_HEX,
+        }
+    ]
+    env = os.environ | {
+        "VOLARA_API_URL": standin.url,
+        "TWITTER_API_URL": standin.url,
+        "VOLARA_API_KEY": "benchmark",
+        "VALIDATED_PERMISSIONS": json.dumps(permissions),
+        "COOKIES": json.dumps(BENCH_COOKIES),
+        "FILE_ID": "benchmark",
+        "MINER_ADDRESS": "0x0",
+    }
+
+    with tempfile.TemporaryDirectory() as runs_dir:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(
+                executor.map(
+                    lambda i: run_once(archive, os.path.join(runs_dir, str(i)), env),
+                    range(args.runs),
+                )
+            )
+        elapsed = time.perf_counter() - start
+
+    seconds = np.array([s for s, _ in results])
+    failed = sum(not ok for _, ok in results)
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99])
+    summary = {
+        "size": args.size,
+        "runs": args.runs,
+        "concurrency": args.concurrency,
+        "failed": failed,
+        "runs_per_second": args.runs / elapsed,
+        "p50_seconds": p50,
+        "p95_seconds": p95,
+        "p99_seconds": p99,
+        "max_seconds": seconds.max(),
+    }
+    print(
+        f"{args.runs} runs of {args.size} tweets at concurrency {args.concurrency}: "
+        f"{summary['runs_per_second']:.2f} runs/s, p50 {p50:.3f}s, p95 {p95:.3f}s, "
+        f"p99 {p99:.3f}s, {failed} failed"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Regression check of the bundled demo inputs. Runs `python -m volara_proof`
+on every file in demo/input against the local stand-in server and fails
+unless each one writes a valid results.json for all of its tweets.
+
+    python -m benchmarks.demo_check
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.standin import StandInConfig, start_standin
+from volara_proof.constants import (
+    VOLARA_DLP_OWNER_ADDRESS,
+    VOLARA_DLP_OWNER_PUBLIC_KEY_HEX,
+)
+
+DEMO_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "demo", "input")
+DEMO_TWEETS = 1181
+CHECK_COOKIES = {"ct0": "demo", "auth_token": "demo"}
+
+
+def check_file(path: str, env: dict[str, str]) -> list[str]:
+    """Proves one demo file, returns what is wrong with its result."""
+    with tempfile.TemporaryDirectory() as run_dir:
+        input_dir = os.path.join(run_dir, "input")
+        output_dir = os.path.join(run_dir, "output")
+        os.makedirs(input_dir)
+        os.makedirs(output_dir)
+        shutil.copy(path, input_dir)
+        subprocess.run(
+            [sys.executable, "-m", "volara_proof"],
+            env=env | {"INPUT_DIR": input_dir, "OUTPUT_DIR": output_dir},
+            check=False,
+        )
+        results_path = os.path.join(output_dir, "results.json")
+        if not os.path.exists(results_path):
+            return ["no results.json was written"]
+        with open(results_path) as f:
+            results = json.load(f)
+
+    problems = []
+    if not results["valid"]:
+        problems.append("the proof is not valid")
+    # The stand-in reports every tweet as unique and scores are 10 per tweet
+    expected_score = DEMO_TWEETS * 10 / 100_000
+    if abs(results["score"] - expected_score) > 1e-9:
+        problems.append(f"score {results['score']} instead of {expected_score}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.parse_args()
+
+    standin = start_standin(StandInConfig())
+    permissions = [
+        {
+            "address": VOLARA_DLP_OWNER_ADDRESS,
+            "public_key": VOLARA_DLP_OWNER_PUBLIC_KEY_HEX,
+        }
+    ]
+    env = os.environ | {
+        "VOLARA_API_URL": standin.url,
+        "TWITTER_API_URL": standin.url,
+        "VOLARA_API_KEY": "demo",
+        "VALIDATED_PERMISSIONS": json.dumps(permissions),
+        "COOKIES": json.dumps(CHECK_COOKIES),
+        "FILE_ID": "demo",
+        "MINER_ADDRESS": "0x0",
+        "SCORING_ENGINE": "flat",
+        "TRACE_OUTPUT": "false",
+    }
+
+    failures = []
+    for name in sorted(os.listdir(DEMO_DIR)):
+        problems = check_file(os.path.join(DEMO_DIR, name), env)
+        print(f"{name}: {'; '.join(problems) or 'ok'}")
+        failures.extend(problems)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
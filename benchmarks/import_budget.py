@@ -0,0 +1,65 @@
+"""
+Checks the cold-start cost of the container entrypoint. Imports
+`volara_proof.__main__` in fresh interpreters and fails when the fastest
+import exceeds the budget or loads a module that only the tweet path needs.
+
+    python -m benchmarks.import_budget --budget-ms 300
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Only needed once a file turns out to hold tweets
+DEFERRED_MODULES = (
+    "numpy",
+    "flatbuffers",
+    "twitter.scraper",
+    "sqlite3",
+    "concurrent.futures.process",
+    "http.server",
+)
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import volara_proof.__main__
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def probe() -> tuple[float, set[str]]:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(out.splitlines()[-1])
+    return result["seconds"], set(result["modules"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--budget-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repeat)]
+    best_ms = min(seconds for seconds, _ in runs) * 1000
+    loaded = [module for module in DEFERRED_MODULES if module in runs[0][1]]
+    print(f"import volara_proof.__main__: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if best_ms > args.budget_ms:
+        failures.append(f"import took {best_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"modules loaded at import time: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Local stand-in for the Volara API and the Twitter GraphQL endpoint, for
+offline load testing. Point VOLARA_API_URL and TWITTER_API_URL at it:
+
+    python -m benchmarks.standin --port 8080 --latency-ms 40 --error-rate 0.01
+"""
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+import typing as T
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class StandInConfig:
+    # Every response is delayed by latency_ms plus an exponential tail with
+    # a mean of latency_jitter_ms
+    latency_ms: float = 0
+    latency_jitter_ms: float = 0
+    # Share of requests answered with a 503
+    error_rate: float = 0
+    # Share of tweet IDs /unique reports as already indexed
+    duplicate_rate: float = 0
+    # GraphQL requests allowed per session and window, 0 for no limit
+    rate_limit: int = 0
+    rate_limit_window: float = 15 * 60
+    # Text served for every scraped tweet, formatted with {tweet_id}. Tweets
+    # are reported unavailable when unset.
+    tweet_text: T.Optional[str] = None
+    seed: T.Optional[int] = None
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StandInConfig):
+        super().__init__(address, _StandInHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.windows: dict[str, tuple[float, int]] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self) -> float:
+        with self.lock:
+            return self.random.random()
+
+    def delay(self) -> float:
+        config = self.config
+        with self.lock:
+            jitter = (
+                self.random.expovariate(1 / config.latency_jitter_ms)
+                if config.latency_jitter_ms
+                else 0
+            )
+        return (config.latency_ms + jitter) / 1000
+
+    def take_quota(self, session: str) -> tuple[int, float]:
+        """Counts one GraphQL request of the session, returns (remaining, reset)."""
+        now = time.time()
+        with self.lock:
+            window_start, count = self.windows.get(session, (now, 0))
+            if now - window_start >= self.config.rate_limit_window:
+                window_start, count = now, 0
+            count += 1
+            self.windows[session] = (window_start, count)
+        return self.config.rate_limit - count, window_start + self.config.rate_limit_window
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StandInServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        if self._delay_or_fail():
+            return
+        body = json.loads(data or b"{}")
+        if self.path == "/v1/validator/unique":
+            duplicate_rate = self.server.config.duplicate_rate
+            self._reply(
+                200, [self.server.draw() >= duplicate_rate for _ in body["tweetIds"]]
+            )
+        elif self.path == "/v1/validator/validate-user":
+            self._reply(200, {"userValidated": True})
+        elif self.path in (
+            "/v1/validator/submit-validation",
+            "/v1/validator/profile-processed",
+        ):
+            self._reply(200, {})
+        else:
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if not (
+            url.path.startswith("/i/api/graphql/")
+            and url.path.endswith("/TweetResultsByRestIds")
+        ):
+            self._reply(404, {"error": f"Unknown path {url.path}"})
+            return
+        if self._delay_or_fail():
+            return
+
+        headers = {}
+        config = self.server.config
+        if config.rate_limit:
+            remaining, reset = self.server.take_quota(self._session())
+            headers = {
+                "x-rate-limit-limit": str(config.rate_limit),
+                "x-rate-limit-remaining": str(max(remaining, 0)),
+                "x-rate-limit-reset": str(int(reset)),
+            }
+            if remaining < 0:
+                self._reply(
+                    429, {"errors": [{"message": "Rate limit exceeded"}]}, headers
+                )
+                return
+
+        tweet_ids = json.loads(parse_qs(url.query)["variables"][0])["tweetIds"]
+        results = [self._tweet_result(tweet_id) for tweet_id in tweet_ids]
+        self._reply(200, {"data": {"tweetResult": results}}, headers)
+
+    def _session(self) -> str:
+        cookies = SimpleCookie(self.headers.get("Cookie", ""))
+        auth_token = cookies.get("auth_token")
+        return auth_token.value if auth_token else ""
+
+    def _tweet_result(self, tweet_id: str) -> dict[str, T.Any]:
+        tweet_text = self.server.config.tweet_text
+        if tweet_text is None:
+            return {"result": {"__typename": "TweetUnavailable"}}
+        return {
+            "result": {
+                "__typename": "Tweet",
+                "rest_id": tweet_id,
+                "legacy": {"full_text": tweet_text.format(tweet_id=tweet_id)},
+            }
+        }
+
+    def _delay_or_fail(self) -> bool:
+        """Sleeps for the configured latency, True if a 503 was sent instead."""
+        time.sleep(self.server.delay())
+        if self.server.draw() < self.server.config.error_rate:
+            self._reply(503, {"error": "Injected failure"})
+            return True
+        return False
+
+    def _reply(
+        self, status: int, body: T.Any, headers: T.Optional[dict[str, str]] = None
+    ) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_standin(
+    config: T.Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> StandInServer:
+    """Serves the stand-in from a daemon thread."""
+    server = StandInServer((host, port), config or StandInConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--duplicate-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--rate-limit-window", type=float, default=15 * 60)
+    parser.add_argument(
+        "--tweet-text",
+        help="Text of every scraped tweet, formatted with {tweet_id}",
+    )
+    parser.add_argument("--seed", type=int)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    server = StandInServer((host, port), StandInConfig(**args))
+    print(f"Serving the Volara API and Twitter stand-in on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Synthetic tweet archives built with the generated flatbuffer builders
+"""
+
+import gzip
+import os
+import random
+import zipfile
+
+import flatbuffers
+
+from volara_proof.buffers import tweet as tweet_fb
+from volara_proof.buffers import tweets as tweets_fb
+
+BASE_TWEET_ID = 1_800_000_000_000_000_000
+BASE_CREATED_AT = 1_720_000_000
+# Text of every synthetic tweet, also served by the stand-in scraper endpoint
+SYNTHETIC_TEXT = "synthetic tweet {tweet_id} #volara"
+
+
+def synthetic_text(tweet_id: str) -> str:
+    return SYNTHETIC_TEXT.format(tweet_id=tweet_id)
+
+
+def build_tweets(count: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    builder = flatbuffers.Builder(count * 192)
+    tweet_offsets = []
+    for i in range(count):
+        tweet_id = str(BASE_TWEET_ID + i)
+        handle = builder.CreateString(f"user{i % 1000}")
+        user_id = builder.CreateString(str(1_000_000 + i % 1000))
+        tweet_id_offset = builder.CreateString(tweet_id)
+        text = builder.CreateString(synthetic_text(tweet_id))
+        tweet_fb.TweetStart(builder)
+        tweet_fb.TweetAddHandle(builder, handle)
+        tweet_fb.TweetAddUserId(builder, user_id)
+        tweet_fb.TweetAddTweetId(builder, tweet_id_offset)
+        tweet_fb.TweetAddText(builder, text)
+        tweet_fb.TweetAddLikes(builder, rng.randrange(10_000))
+        tweet_fb.TweetAddRetweets(builder, rng.randrange(1_000))
+        tweet_fb.TweetAddReplies(builder, rng.randrange(1_000))
+        tweet_fb.TweetAddQuotes(builder, rng.randrange(100))
+        tweet_fb.TweetAddCreatedAt(builder, BASE_CREATED_AT + rng.randrange(10_000_000))
+        tweet_offsets.append(tweet_fb.TweetEnd(builder))
+
+    tweets_fb.TweetsStartTweetsVector(builder, count)
+    for tweet_offset in reversed(tweet_offsets):
+        builder.PrependUOffsetTRelative(tweet_offset)
+    tweets = builder.EndVector()
+    tweets_fb.TweetsStart(builder)
+    tweets_fb.TweetsAddTweets(builder, tweets)
+    builder.Finish(tweets_fb.TweetsEnd(builder))
+    return bytes(builder.Output())
+
+
+ARCHIVE_FORMATS = ("plain", "zip", "zip-stored", "gzip", "zstd")
+_SUFFIXES = {"plain": "data", "gzip": "data.gz", "zstd": "data.zst"}
+
+
+def write_archive(directory: str, count: int, archive_format: str) -> str:
+    """Writes (or reuses) a synthetic archive and returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    suffix = _SUFFIXES.get(archive_format, "zip")
+    path = os.path.join(directory, f"tweets-{count}-{archive_format}.{suffix}")
+    if os.path.exists(path):
+        return path
+
+    data = build_tweets(count)
+    temp_path = f"{path}.tmp"
+    if archive_format == "plain":
+        with open(temp_path, "wb") as f:
+            f.write(data)
+    elif archive_format == "gzip":
+        with open(temp_path, "wb") as f:
+            f.write(gzip.compress(data))
+    elif archive_format == "zstd":
+        import zstandard
+
+        with open(temp_path, "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(data))
+    else:
+        compression = zipfile.ZIP_STORED if archive_format == "zip-stored" else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(temp_path, "w", compression) as zip_ref:
+            zip_ref.writestr("tweets.data", data)
+    os.replace(temp_path, path)
+    return path
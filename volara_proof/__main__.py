@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -6,11 +7,24 @@ import traceback
 from typing import Dict, Any
 
 from volara_proof.proof import Proof
-from volara_proof.constants import VOLARA_DLP_OWNER_ADDRESS, VOLARA_DLP_OWNER_PUBLIC_KEY_HEX
+from volara_proof.constants import (
+    METRICS_PATH,
+    METRICS_PORT,
+    VOLARA_DLP_OWNER_ADDRESS,
+    VOLARA_DLP_OWNER_PUBLIC_KEY_HEX,
+)
+from volara_proof.metrics import REGISTRY
+from volara_proof.models.proof_config import ProofConfig
+from volara_proof.server import ProofServer
 
-INPUT_DIR, OUTPUT_DIR = "/input", "/output"
+INPUT_DIR = os.environ.get("INPUT_DIR", "/input")
+OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "/output")
+# Set either to keep running and take proof jobs from them, see volara_proof/server.py
+SPOOL_DIR = os.environ.get("SPOOL_DIR")
+SERVER_SOCKET = os.environ.get("SERVER_SOCKET")
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 def load_config() -> Dict[str, Any]:
@@ -22,6 +36,14 @@ def load_config() -> Dict[str, Any]:
         "volara_api_key": os.environ.get("VOLARA_API_KEY", None),
         "file_id": os.environ.get("FILE_ID", None),
         "miner_address": os.environ.get("MINER_ADDRESS", None),
+        "batch_mode": os.environ.get("BATCH_MODE", "false").lower() in ("1", "true"),
+        "batch_manifest": os.environ.get("BATCH_MANIFEST", None),
+        "trace_path": (
+            os.path.join(OUTPUT_DIR, "trace.json")
+            if os.environ.get("TRACE_OUTPUT", "true").lower() in ("1", "true")
+            else None
+        ),
+        "trace_metadata": os.environ.get("TRACE_METADATA", "false").lower() in ("1", "true"),
     }
     return config
 
@@ -45,10 +67,19 @@ def run() -> None:
     if not assess_validity(validated_permissions):
         raise ValueError("Permissions failed to validate")
 
+    if SPOOL_DIR or SERVER_SOCKET:
+        server = ProofServer(ProofConfig(**config), SPOOL_DIR, SERVER_SOCKET)
+        asyncio.run(server.serve())
+        return
+
     if not input_files_exist:
         raise FileNotFoundError(f"No input files found in {INPUT_DIR}")
 
     proof = Proof(config)
+    if config["batch_mode"]:
+        write_batch_results(config, proof.generate_batch())
+        return
+
     proof_response = proof.generate()
 
     output_path = os.path.join(OUTPUT_DIR, "results.json")
@@ -57,10 +88,38 @@ def run() -> None:
     logging.info(f"Proof generation complete: {proof_response}")
 
 
+def write_batch_results(config: Dict[str, Any], results: Dict[str, Any]) -> None:
+    """Write one result file per input file plus an aggregate results.json."""
+    aggregate = {}
+    for input_filename, result in results.items():
+        if isinstance(result, BaseException):
+            aggregate[input_filename] = {"error": str(result)}
+            continue
+        aggregate[input_filename] = result.dict()
+        output_path = os.path.join(OUTPUT_DIR, f"{input_filename}.results.json")
+        with open(output_path, "w") as f:
+            json.dump(aggregate[input_filename], f, indent=2)
+
+    with open(os.path.join(OUTPUT_DIR, "results.json"), "w") as f:
+        json.dump({"dlp_id": config["dlp_id"], "files": aggregate}, f, indent=2)
+
+    failed = [name for name, result in aggregate.items() if "error" in result]
+    logging.info(
+        f"Batch proof generation complete: {len(aggregate) - len(failed)} succeeded, {len(failed)} failed"
+    )
+    if failed:
+        raise RuntimeError(f"Proof generation failed for {len(failed)} files: {failed}")
+
+
 if __name__ == "__main__":
+    if METRICS_PORT:
+        REGISTRY.serve(METRICS_PORT)
     try:
         run()
     except Exception as e:
         logging.error(f"Error during proof generation: {e}")
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if METRICS_PATH:
+            REGISTRY.write(METRICS_PATH)
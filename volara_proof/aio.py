@@ -0,0 +1,46 @@
+import asyncio
+import os
+import threading
+import typing as T
+
+R = T.TypeVar("R")
+
+_lock = threading.Lock()
+_loop: T.Optional[asyncio.AbstractEventLoop] = None
+_thread: T.Optional[threading.Thread] = None
+
+
+def run_sync(coro: T.Coroutine[T.Any, T.Any, R]) -> R:
+    """
+    Runs a coroutine to completion on a background event loop shared by every
+    synchronous caller, so that connection pools bound to that loop stay warm
+    between calls.
+    """
+    loop = _background_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync cannot be called from the background event loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="volara-proof-loop", daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def _reset_after_fork() -> None:
+    # The loop thread does not survive a fork, the child starts its own
+    global _lock, _loop, _thread
+    _lock = threading.Lock()
+    _loop = None
+    _thread = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,138 @@
+"""
+Structural verifier for `Tweets` flatbuffers, run before anything is decoded
+"""
+
+import typing as T
+
+import numpy as np
+
+from volara_proof.buffers.tweet_columns import (
+    _CREATED_AT,
+    _LIKES,
+    _QUOTES,
+    _REPLIES,
+    _RETWEETS,
+    _TEXT,
+    _TWEET_ID,
+    _USER_ID,
+    _gather,
+)
+from volara_proof.buffers.tweets import Tweets
+from volara_proof.exceptions import InvalidArchiveException
+
+# vtable offset of the tweets vector in the Tweets table, see buffers/tweets.py
+_TWEETS = 4
+# vtable offset of Tweet.handle, which decode_tweets does not read
+_HANDLE = 4
+
+_STRING_FIELDS = {
+    _HANDLE: "handle",
+    _USER_ID: "user_id",
+    _TWEET_ID: "tweet_id",
+    _TEXT: "text",
+}
+_SCALAR_FIELDS = {
+    _LIKES: ("likes", 4),
+    _RETWEETS: ("retweets", 4),
+    _REPLIES: ("replies", 4),
+    _QUOTES: ("quotes", 4),
+    _CREATED_AT: ("created_at", 8),
+}
+
+
+def verify_tweets(tweets_data: Tweets) -> None:
+    """
+    Bounds-checks the Tweets table, its tweets vector and every field of every
+    tweet in a few vectorized passes. Raises InvalidArchiveException at the
+    first violation, so decode_tweets never reads outside the buffer.
+    """
+    tab = tweets_data._tab
+    view = np.frombuffer(tab.Bytes, dtype=np.uint8)
+
+    root = _Tables(view, np.array([tab.Pos], dtype=np.int64), None)
+    present, positions = root.field(_TWEETS, 4, "tweets vector")
+    if not present[0]:
+        return
+    vector = positions + _gather(view, positions, "<u4")
+    _require(view, vector, 4, "tweets vector", None)
+    count = int(_gather(view, vector, "<u4")[0])
+    _check(vector + 4 + 4 * count <= len(view), "tweets vector", None)
+
+    slots = int(vector[0]) + 4 + 4 * np.arange(count, dtype=np.int64)
+    tweets = _Tables(view, slots + _gather(view, slots, "<u4"), np.arange(count))
+    for voffset, name in _STRING_FIELDS.items():
+        present, positions = tweets.field(voffset, 4, name)
+        index = tweets.index[present]
+        starts = positions + _gather(view, positions, "<u4")
+        _require(view, starts, 4, name, index)
+        # Raw inputs are stripped of trailing NULs, so the terminator of the
+        # string at the end of the buffer may be missing
+        lengths = _gather(view, starts, "<u4")
+        _check(starts + 4 + lengths <= len(view), name, index)
+    for voffset, (name, size) in _SCALAR_FIELDS.items():
+        tweets.field(voffset, size, name)
+
+
+class _Tables:
+    """Tables whose vtables and extent have been checked to lie in the buffer."""
+
+    def __init__(
+        self, view: np.ndarray, positions: np.ndarray, index: T.Optional[np.ndarray]
+    ):
+        # `index` maps each table to its tweet, None for the root table
+        self.what = "Tweets table" if index is None else "table"
+        self.view = view
+        self.positions = positions
+        self.index = index
+        _require(view, positions, 4, self.what, index)
+        self.vtables = positions - _gather(view, positions, "<i4")
+        _require(view, self.vtables, 4, f"{self.what} vtable", index)
+        self.vtable_lengths = _gather(view, self.vtables, "<u2")
+        self.sizes = _gather(view, self.vtables + 2, "<u2")
+        _check(
+            (self.vtable_lengths >= 4)
+            & (self.vtable_lengths % 2 == 0)
+            & (self.vtables + self.vtable_lengths <= len(view)),
+            f"{self.what} vtable",
+            index,
+        )
+        _check(
+            (self.sizes >= 4) & (positions + self.sizes <= len(view)), self.what, index
+        )
+
+    def field(self, voffset: int, size: int, what: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Checks that the field lies inside its table. Returns where the field is
+        present and its position.
+        """
+        present = self.vtable_lengths >= voffset + 2
+        offsets = np.zeros(len(self.positions), dtype=np.int64)
+        offsets[present] = _gather(self.view, self.vtables[present] + voffset, "<u2")
+        present = offsets != 0
+        _check(
+            offsets[present] + size <= self.sizes[present],
+            what,
+            None if self.index is None else self.index[present],
+        )
+        return present, self.positions[present] + offsets[present]
+
+
+def _require(
+    view: np.ndarray,
+    positions: np.ndarray,
+    size: int,
+    what: str,
+    index: T.Optional[np.ndarray],
+) -> None:
+    _check((positions >= 0) & (positions + size <= len(view)), what, index)
+
+
+def _check(ok: np.ndarray, what: str, index: T.Optional[np.ndarray]) -> None:
+    if ok.all():
+        return
+    if index is None:
+        raise InvalidArchiveException(f"Malformed tweets.data: {what} is out of bounds")
+    tweet = int(index[np.argmin(ok)])
+    raise InvalidArchiveException(
+        f"Malformed tweets.data: {what} of tweet {tweet} is out of bounds"
+    )
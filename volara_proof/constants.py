@@ -1,3 +1,68 @@
-VOLARA_API_URL = "https://api.volara.xyz"
+import os
+
+VOLARA_API_URL = os.environ.get("VOLARA_API_URL", "https://api.volara.xyz")
 VOLARA_DLP_OWNER_ADDRESS = "0x07cdb997c45a008B803FCC6904a0f7E4383a63b6"
 VOLARA_DLP_OWNER_PUBLIC_KEY_HEX = "0xebd0b3dbe1ba0b298bc05c5f22e9b9c0816ac4d5bbfe00d8da2ec11a2be5aa9f3532e107b2bfa9b2b3e521c570392f1868f05ae8e697a499a9d1883777102252"
+
+VOLARA_API_POOL_SIZE = 16
+VOLARA_API_CONNECT_TIMEOUT = 5
+VOLARA_API_READ_TIMEOUT = 120
+VOLARA_API_RETRIES = 4
+VOLARA_API_BACKOFF_BASE = 0.5
+VOLARA_API_BACKOFF_MAX = 8.0
+# Request bodies at least this large are sent gzip-encoded, 0 disables it
+VOLARA_API_GZIP_MIN_BYTES = int(os.environ.get("VOLARA_API_GZIP_MIN_BYTES", 0))
+
+# Uniqueness lookups are split into chunks of this many IDs, sent concurrently
+VOLARA_UNIQUE_CHUNK_SIZE = int(os.environ.get("VOLARA_UNIQUE_CHUNK_SIZE", 5_000))
+VOLARA_UNIQUE_CONCURRENCY = int(os.environ.get("VOLARA_UNIQUE_CONCURRENCY", 4))
+
+# Directory of the local index of tweet IDs known not to be unique, unset disables it
+SEEN_TWEETS_DIR = os.environ.get("SEEN_TWEETS_DIR", None)
+
+TWITTER_API_URL = os.environ.get("TWITTER_API_URL", "https://twitter.com")
+TWITTER_SCRAPE_CONCURRENCY = 8
+TWITTER_SCRAPE_TIMEOUT = 20
+# Longest a scrape waits for a rate limit window to reset before failing
+TWITTER_RATE_LIMIT_MAX_WAIT = 120
+
+# SQLite file caching scraped tweet texts, unset disables the cache
+SCRAPE_CACHE_PATH = os.environ.get("SCRAPE_CACHE_PATH", None)
+SCRAPE_CACHE_TTL = float(os.environ.get("SCRAPE_CACHE_TTL", 24 * 60 * 60))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.environ.get("SCRAPE_CACHE_MAX_ENTRIES", 100_000))
+
+# Sequential validation sampling, see proofs/sampling.py: tweets are scraped in rounds until
+# there is SAMPLING_CONFIDENCE that at most SAMPLING_MALICIOUS_RATE of the unique tweets are fake
+# (more certainty is asked of larger files), up to SAMPLING_MAX_TWEETS per file. Files can be
+# rejected when more than SAMPLING_MAX_UNAVAILABLE of the sampled tweets are unavailable, the
+# default of 1 never rejects them. Only then are unavailable tweets replaced, by at most
+# SAMPLING_MAX_REPLACEMENTS times as many draws as the confidence asks for.
+SAMPLING_CONFIDENCE = float(os.environ.get("SAMPLING_CONFIDENCE", 0.65))
+SAMPLING_MALICIOUS_RATE = float(os.environ.get("SAMPLING_MALICIOUS_RATE", 0.1))
+SAMPLING_ROUND_SIZE = int(os.environ.get("SAMPLING_ROUND_SIZE", 10))
+SAMPLING_MAX_TWEETS = int(os.environ.get("SAMPLING_MAX_TWEETS", 100))
+SAMPLING_MAX_UNAVAILABLE = float(os.environ.get("SAMPLING_MAX_UNAVAILABLE", 1))
+SAMPLING_MAX_REPLACEMENTS = float(os.environ.get("SAMPLING_MAX_REPLACEMENTS", 1))
+# SQLite file of the sampling results of each contributor, unset disables it
+SAMPLING_HISTORY_PATH = os.environ.get("SAMPLING_HISTORY_PATH", None)
+
+# Scoring engine for unique tweets, see proofs/scoring.py
+SCORING_ENGINE = os.environ.get("SCORING_ENGINE", "flat")
+
+# Reward submissions with more tweet records than this are sent in pages, 0 disables paging
+REWARDS_PAGE_SIZE = int(os.environ.get("REWARDS_PAGE_SIZE", 0))
+
+# OpenMetrics export of the validator metrics to a file and/or a local HTTP port, disabled when unset
+METRICS_PATH = os.environ.get("METRICS_PATH")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+
+# Server mode: proofs run at once, socket jobs waiting or running before new ones are
+# turned away, and seconds between scans of the spool directory
+SERVER_CONCURRENCY = int(os.environ.get("SERVER_CONCURRENCY", 4))
+SERVER_MAX_PENDING = int(os.environ.get("SERVER_MAX_PENDING", 64))
+SPOOL_POLL_INTERVAL = float(os.environ.get("SPOOL_POLL_INTERVAL", 0.5))
+
+# Input archives are rejected before decompressing when tweets.data is larger than this
+# uncompressed, or compressed at a higher ratio than this, as zip bombs are
+EXTRACT_MAX_MEMBER_BYTES = int(os.environ.get("EXTRACT_MAX_MEMBER_BYTES", 1 << 30))
+EXTRACT_MAX_COMPRESSION_RATIO = float(os.environ.get("EXTRACT_MAX_COMPRESSION_RATIO", 200))
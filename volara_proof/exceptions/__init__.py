@@ -8,3 +8,6 @@ class VolaraApiServerException(ValidatorEphemeralException): ...
 
 
 class TwitterScrapeException(ValidatorEphemeralException): ...
+
+
+class InvalidArchiveException(ValueError): ...
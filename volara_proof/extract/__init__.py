@@ -1,43 +1,412 @@
+import mmap
+import os
+import struct
+import typing as T
 import zipfile
+import zlib
 import json
+from dataclasses import dataclass
+
+from volara_proof.constants import (
+    EXTRACT_MAX_MEMBER_BYTES,
+    EXTRACT_MAX_COMPRESSION_RATIO,
+)
+from volara_proof.exceptions import (
+    InvalidArchiveException,
+    ValidatorCriticalException,
+)
 from volara_proof.models.user_data import UserData
-from volara_proof.buffers.tweets import Tweets
 
+if T.TYPE_CHECKING:
+    from volara_proof.buffers.tweets import Tweets
 
-def extract_user_data(zip_file_path: str) -> UserData | None:
-    with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
-        file_names = zip_ref.namelist()
-        if "user_data.json" in file_names:
-            with zip_ref.open("user_data.json", "r") as file:
-                return UserData(**json.load(file))
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+# An archive without members starts with its end of central directory record
+_EMPTY_ARCHIVE_SIGNATURE = b"PK\x05\x06"
+_USER_DATA = "user_data.json"
+_TWEETS_DATA = "tweets.data"
+_MAX_USER_DATA_BYTES = 1 << 20
+# Small members compress well without being a threat, their ratio is not checked
+_MIN_RATIO_CHECK_BYTES = 1 << 20
+# tweets.data may itself be compressed, raw or inside the zip
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+# First byte of the magic of skippable zstd frames, 0x184D2A50 to 0x184D2A5F
+_ZSTD_SKIPPABLE_MAGIC = {bytes([0x50 + i]) for i in range(16)}
+_DECOMPRESS_CHUNK_SIZE = 1 << 20
+
+
+@dataclass(frozen=True)
+class ProfilePayload:
+    user_data: UserData
+
+
+@dataclass(frozen=True)
+class TweetsPayload:
+    tweets_data: "Tweets"
+    # Bytes of the tweets buffer
+    size: int
+
+
+ArchivePayload = ProfilePayload | TweetsPayload
+
+
+def read_archive(
+    file_path: str,
+    max_member_size: int = EXTRACT_MAX_MEMBER_BYTES,
+    max_compression_ratio: float = EXTRACT_MAX_COMPRESSION_RATIO,
+) -> ArchivePayload:
+    """
+    Opens an input file once and returns what it holds. Zip archives are told
+    apart from raw tweet buffers by their magic bytes. A zip with
+    user_data.json holds a profile, otherwise it must hold tweets.data.
+    tweets.data, raw or in the zip, may be zstd or gzip compressed.
+
+    Members over `max_member_size` uncompressed, or compressed at a higher
+    ratio than `max_compression_ratio`, are rejected from the central
+    directory before anything is decompressed.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            view = memoryview(b"")
         else:
-            return None
+            view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        # zipfile reads the directory and compressed members through the open
+        # file, stored members are sliced out of the map
+        if view[:4] in (_LOCAL_HEADER_SIGNATURE, _EMPTY_ARCHIVE_SIGNATURE):
+            return _read_zip(f, view, max_member_size, max_compression_ratio)
+
+    if view[:4] == _ZSTD_MAGIC or view[:2] == _GZIP_MAGIC:
+        tweets = _decompress_tweets(view, max_member_size, max_compression_ratio)
+    else:
+        tweets = _strip_nul(view)
+    if not tweets:
+        raise InvalidArchiveException("Input file holds no data")
+    if len(tweets) > max_member_size:
+        raise InvalidArchiveException(
+            f"{_TWEETS_DATA} is {len(tweets)} bytes, over the limit of {max_member_size}"
+        )
+    return _tweets_payload(tweets)
+
+
+def extract_user_data(zip_file_path: str) -> UserData | None:
+    payload = read_archive(zip_file_path)
+    return payload.user_data if isinstance(payload, ProfilePayload) else None
 
 
-def extract_data(zip_file_path: str):
+def extract_data(zip_file_path: str) -> "Tweets":
     """
-    Extracts the data from the zip file
-    :param zip_file_path: Path to the zip file
-    :return: Object containing a quality score and whether the file is valid
+    Extracts the tweets from an input file
+    :param zip_file_path: Path to the zip file or raw tweets buffer
+    :return: The Tweets flatbuffer table
 
     Throws
         If extract contraints are not respected
     """
-    required_files = ["tweets.data"]
+    payload = read_archive(zip_file_path)
+    if not isinstance(payload, TweetsPayload):
+        raise InvalidArchiveException(
+            f"Zip file does not contain all required files: {[_TWEETS_DATA]}"
+        )
+    return payload.tweets_data
+
+
+def _read_zip(
+    archive: T.BinaryIO,
+    view: memoryview,
+    max_member_size: int,
+    max_compression_ratio: float,
+) -> ArchivePayload:
+    with zipfile.ZipFile(archive, "r") as zip_ref:
+        file_names = set(zip_ref.namelist())
+        if _USER_DATA in file_names:
+            info = zip_ref.getinfo(_USER_DATA)
+            _check_member(info, _MAX_USER_DATA_BYTES, max_compression_ratio)
+            return ProfilePayload(UserData(**json.loads(_read_member(zip_ref, info))))
+        if _TWEETS_DATA not in file_names:
+            raise InvalidArchiveException(
+                f"Zip file does not contain all required files: {[_TWEETS_DATA]}"
+            )
+        info = zip_ref.getinfo(_TWEETS_DATA)
+        _check_member(info, max_member_size, max_compression_ratio)
+        member = _stored_member(view, info)
+        if member is None:
+            member = _read_member(zip_ref, info)
+        return _tweets_payload(
+            _decompress_tweets(memoryview(member), max_member_size, max_compression_ratio)
+        )
+
+
+def _tweets_payload(buffer: memoryview | bytearray) -> TweetsPayload:
+    """Verifies the structure of the tweets buffer before anything reads it."""
+    # The flatbuffers runtime pulls in NumPy, only load it for tweet archives
+    from volara_proof.buffers.tweets import Tweets
+    from volara_proof.buffers.tweet_verifier import verify_tweets
+
+    if len(buffer) < 4:
+        raise InvalidArchiveException(f"{_TWEETS_DATA} is truncated")
+    tweets_data = Tweets.GetRootAs(buffer)
+    verify_tweets(tweets_data)
+    return TweetsPayload(tweets_data, len(buffer))
+
+
+def _decompress_tweets(
+    data: memoryview, max_size: int, max_ratio: float
+) -> memoryview:
+    """
+    Decompresses zstd or gzip compressed tweets into a buffer allocated once
+    at the size the frame declares, anything else is returned as is. The
+    compressed data may be followed by NUL padding, like raw tweets.
+    """
+    if data[:4] == _ZSTD_MAGIC:
+        try:
+            import zstandard
+        except ImportError:
+            raise ValidatorCriticalException(
+                f"zstandard is required to read zstd compressed {_TWEETS_DATA}"
+            )
+        try:
+            end, size = _zstd_frames(data, zstandard)
+            data = data[:end]
+            _check_decompressed_size(size, len(data), max_size, max_ratio)
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                data, read_across_frames=True
+            )
+            return _read_into(
+                reader.readinto, size, _size_limit(size, len(data), max_size, max_ratio)
+            )
+        except zstandard.ZstdError as e:
+            raise InvalidArchiveException(f"Corrupt zstd {_TWEETS_DATA}: {e}")
+    if data[:2] == _GZIP_MAGIC:
+        size, declared = _gzip_trailer_sizes(data)
+        _check_decompressed_size(size, len(data), max_size, max_ratio)
+        try:
+            return _read_into(
+                _gzip_readinto(data, declared),
+                size,
+                _size_limit(-1, len(data), max_size, max_ratio),
+            )
+        except zlib.error as e:
+            raise InvalidArchiveException(f"Corrupt gzip {_TWEETS_DATA}: {e}")
+    return data
+
+
+def _size_limit(size: int, compressed_size: int, max_size: int, max_ratio: float) -> int:
+    """
+    Most bytes to decompress: the declared size when it is known, else
+    bounded by the ratio limit.
+    """
+    if size >= 0:
+        return min(size, max_size)
+    return min(max_size, max(_MIN_RATIO_CHECK_BYTES, int(compressed_size * max_ratio)))
 
-    # Load data from zip file and validate that it contains the required files
-    try:
-        with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
-            file_names = zip_ref.namelist()
-            if not all(file in file_names for file in required_files):
-                raise ValueError(
-                    f"Zip file does not contain all required files: {required_files}"
+
+def _zstd_frames(data: memoryview, zstandard: T.Any) -> tuple[int, int]:
+    """
+    Offset just past the last zstd frame, found from the frame and block
+    headers, and the content size of all frames, -1 when any frame leaves it
+    out. Only NUL padding may follow the frames.
+    """
+    position = 0
+    size = 0
+    while position < len(data):
+        magic = bytes(data[position : position + 4])
+        if magic == _ZSTD_MAGIC:
+            checksum = position + 4 < len(data) and data[position + 4] & 0x04
+            frame_size = zstandard.frame_content_size(data[position:])
+            size = size + frame_size if size >= 0 and frame_size >= 0 else -1
+            position += zstandard.frame_header_size(data[position:])
+            last = False
+            while not last:
+                if position + 3 > len(data):
+                    raise InvalidArchiveException(f"Truncated zstd {_TWEETS_DATA}")
+                header = int.from_bytes(data[position : position + 3], "little")
+                last, block_type = header & 1, (header >> 1) & 3
+                # RLE blocks hold one byte repeated the block size times
+                position += 3 + (1 if block_type == 1 else header >> 3)
+            position += 4 if checksum else 0
+        elif magic[:1] in _ZSTD_SKIPPABLE_MAGIC and magic[1:] == b"\x2a\x4d\x18":
+            position += 8 + struct.unpack("<I", data[position + 4 : position + 8])[0]
+        elif not _strip_nul(data[position:]):
+            break
+        else:
+            raise InvalidArchiveException(f"Trailing data after zstd {_TWEETS_DATA}")
+    if position > len(data):
+        raise InvalidArchiveException(f"Truncated zstd {_TWEETS_DATA}")
+    return position, size
+
+
+def _gzip_trailer_sizes(data: memoryview) -> tuple[int, int]:
+    """
+    Size in the trailer of the last gzip member and the most it can declare,
+    -1 when there is no trailer. NUL padding may follow the trailer, but the
+    top bytes of a size under 16 MiB are NUL too: the size takes the trailer
+    to end as late as it can, the bound as early as it can. Both are equal
+    when the data does not end with a NUL.
+    """
+    end = len(_strip_nul(data))
+    if end < 18:
+        return -1, -1
+    # The size of a trailer holds at most 3 NUL top bytes before it would be 0
+    zeros = min(len(data) - end, 3)
+    size = int.from_bytes(data[end + zeros - 4 : end + zeros], "little")
+    return size, int.from_bytes(data[end - 4 : end], "little")
+
+
+def _check_decompressed_size(
+    size: int, compressed_size: int, max_size: int, max_ratio: float
+) -> None:
+    if size > max_size:
+        raise InvalidArchiveException(
+            f"{_TWEETS_DATA} is {size} bytes decompressed, over the limit of {max_size}"
+        )
+    ratio = size / max(compressed_size, 1)
+    if size > _MIN_RATIO_CHECK_BYTES and ratio > max_ratio:
+        raise InvalidArchiveException(
+            f"{_TWEETS_DATA} is compressed {ratio:.0f}:1, over the limit of {max_ratio:.0f}:1"
+        )
+
+
+def _gzip_readinto(data: memoryview, declared: int) -> T.Callable[[memoryview], int]:
+    """
+    readinto over the decompressed stream of the (multi-member) gzip data.
+    Fails as soon as the first member goes past the `declared` size, zlib
+    only checks it against the trailer once the whole member is read.
+    """
+    decompressor = zlib.decompressobj(wbits=31)
+    position = 0
+    pending = b""
+    # The trailer only holds the size of the last member, later members are
+    # bounded by the ratio limit of the whole stream
+    first_member = 0
+
+    def readinto(out: memoryview) -> int:
+        nonlocal decompressor, position, pending, declared, first_member
+        while not pending:
+            if decompressor.eof:
+                # Concatenated members are read one after the other, up to padding
+                rest = decompressor.unused_data
+                if not rest.strip(b"\x00") and not _strip_nul(data[position:]):
+                    return 0
+                decompressor = zlib.decompressobj(wbits=31)
+                declared = -1
+                pending = decompressor.decompress(rest, len(out))
+                continue
+            if decompressor.unconsumed_tail:
+                pending = decompressor.decompress(decompressor.unconsumed_tail, len(out))
+            elif position < len(data):
+                chunk = data[position : position + _DECOMPRESS_CHUNK_SIZE]
+                position += len(chunk)
+                pending = decompressor.decompress(chunk, len(out))
+            else:
+                raise InvalidArchiveException(f"Truncated gzip {_TWEETS_DATA}")
+            if declared >= 0:
+                first_member += len(pending)
+                if first_member > declared:
+                    raise InvalidArchiveException(
+                        f"{_TWEETS_DATA} decompresses to more than the {declared} "
+                        "bytes its gzip trailer declares"
+                    )
+        read = min(len(pending), len(out))
+        out[:read] = pending[:read]
+        pending = pending[read:]
+        return read
+
+    return readinto
+
+
+def _read_into(
+    readinto: T.Callable[[memoryview], int], size: int, max_size: int
+) -> memoryview:
+    """
+    Reads a decompressed stream into a buffer preallocated at `size`. The
+    buffer only grows when the size is unknown (-1) or understated, and the
+    read fails as soon as the stream goes past `max_size`.
+    """
+    buffer = bytearray(min(max(size, 0), max_size))
+    position = 0
+    scratch = bytearray(1)
+    while True:
+        if position == len(buffer):
+            # Look for the end of the stream before growing the buffer
+            if not readinto(memoryview(scratch)):
+                break
+            if position >= max_size:
+                raise InvalidArchiveException(
+                    f"{_TWEETS_DATA} decompresses to more than {max_size} bytes"
                 )
+            # Unknown or understated size, grow geometrically
+            growth = min(max(position, _DECOMPRESS_CHUNK_SIZE), max_size - position)
+            buffer.extend(bytes(growth))
+            buffer[position] = scratch[0]
+            position += 1
+        with memoryview(buffer) as view:
+            read = readinto(view[position:])
+        if not read:
+            break
+        position += read
+    return memoryview(buffer)[:position]
+
+
+def _check_member(info: zipfile.ZipInfo, max_size: int, max_ratio: float) -> None:
+    if info.file_size > max_size:
+        raise InvalidArchiveException(
+            f"{info.filename} is {info.file_size} bytes uncompressed, "
+            f"over the limit of {max_size}"
+        )
+    ratio = info.file_size / max(info.compress_size, 1)
+    if info.file_size > _MIN_RATIO_CHECK_BYTES and ratio > max_ratio:
+        raise InvalidArchiveException(
+            f"{info.filename} is compressed {ratio:.0f}:1, over the limit of {max_ratio:.0f}:1"
+        )
+
+
+def _stored_member(view: memoryview, info: zipfile.ZipInfo) -> memoryview | None:
+    """
+    Slices the byte range of an uncompressed, unencrypted member straight out
+    of the mapped archive. Returns None when the member has to go through
+    zipfile.
+    """
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+    header = view[info.header_offset : info.header_offset + _LOCAL_HEADER_SIZE]
+    if len(header) != _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local file header for {info.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    start = info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length
+    if start + info.file_size > len(view):
+        raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+    return view[start : start + info.file_size]
+
+
+def _read_member(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytearray:
+    """Decompresses a member into a buffer allocated once at its final size."""
+    buffer = bytearray(info.file_size)
+    view = memoryview(buffer)
+    position = 0
+    with zip_ref.open(info, "r") as file:
+        while position < info.file_size:
+            read = file.readinto(view[position:])
+            if not read:
+                break
+            position += read
+    return buffer
+
 
-            with zip_ref.open("tweets.data", "r") as file:
-                file_bytes = file.read()
-                return Tweets.GetRootAs(file_bytes)
-    except zipfile.BadZipFile:
-        with open(zip_file_path, "rb") as f:
-            file_bytes = f.read().strip(b"\x00")
-            return Tweets.GetRootAs(file_bytes)
+def _strip_nul(view: memoryview, chunk_size: int = 1 << 16) -> memoryview:
+    """Slices NUL padding off both ends of the view without copying the data."""
+    start, end = 0, len(view)
+    while start < end:
+        chunk = bytes(view[start : min(start + chunk_size, end)])
+        stripped = chunk.lstrip(b"\x00")
+        start += len(chunk) - len(stripped)
+        if stripped:
+            break
+    while end > start:
+        chunk = bytes(view[max(end - chunk_size, start) : end])
+        stripped = chunk.rstrip(b"\x00")
+        end -= len(chunk) - len(stripped)
+        if stripped:
+            break
+    return view[start:end]
@@ -0,0 +1,234 @@
+"""
+Process-wide counters and histograms of the validator, exported in the
+OpenMetrics text format to a file or over HTTP.
+"""
+
+import abc
+import os
+import tempfile
+import threading
+import typing as T
+from bisect import bisect_left
+
+if T.TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _Metric(abc.ABC):
+    kind: str
+
+    def __init__(self, name: str, documentation: str, labelnames: T.Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], T.Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], **extra: str) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def drain(self) -> dict[tuple[str, ...], T.Any]:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def render(self) -> T.Iterator[str]:
+        yield f"# TYPE {self.name} {self.kind}"
+        yield f"# HELP {self.name} {_escape(self.documentation)}"
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield from self._samples(key, value)
+
+    @abc.abstractmethod
+    def _samples(self, key: tuple[str, ...], value: T.Any) -> T.Iterator[str]:
+        ...
+
+    @abc.abstractmethod
+    def merge(self, values: dict[tuple[str, ...], T.Any]) -> None:
+        ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, values: dict[tuple[str, ...], float]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def _samples(self, key: tuple[str, ...], value: float) -> T.Iterator[str]:
+        yield f"{self.name}_total{self._labels(key)} {value}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: T.Sequence[str] = (),
+        buckets: T.Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts with a last +Inf bucket, then the sum
+            state = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def merge(self, values: dict[tuple[str, ...], list]) -> None:
+        with self._lock:
+            for key, (counts, total) in values.items():
+                state = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+
+    def _samples(self, key: tuple[str, ...], value: list) -> T.Iterator[str]:
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            yield f"{self.name}_bucket{self._labels(key, le=le)} {cumulative}"
+        yield f"{self.name}_count{self._labels(key)} {cumulative}"
+        yield f"{self.name}_sum{self._labels(key)} {total}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: T.Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: T.Sequence[str] = (),
+        buckets: T.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: _Metric) -> T.Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join([*lines, "# EOF"]) + "\n"
+
+    def drain(self) -> dict[str, dict]:
+        """Takes all values out of the registry, e.g. to merge them into another process."""
+        return {name: metric.drain() for name, metric in self._metrics.items()}
+
+    def merge(self, drained: dict[str, dict]) -> None:
+        for name, values in drained.items():
+            self._metrics[name].merge(values)
+
+    def write(self, path: str) -> None:
+        """Replaces the file at `path` atomically, so scrapers never see partial output."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".metrics")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> "ThreadingHTTPServer":
+        """Serves the metrics at any path from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                data = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+PROOFS = REGISTRY.counter(
+    "volara_proofs", "Proofs generated, by outcome", ("outcome",)
+)
+PROOF_SECONDS = REGISTRY.histogram(
+    "volara_proof_duration_seconds", "Wall time of proofs, by outcome", ("outcome",)
+)
+PROOF_TWEETS = REGISTRY.counter(
+    "volara_proof_tweets", "Tweets in the files that were proven"
+)
+UNIQUE_LOOKUP_TWEETS = REGISTRY.counter(
+    "volara_unique_lookup_tweets",
+    "Tweet IDs looked up for uniqueness, by whether they were already indexed",
+    ("result",),
+)
+REWARD_RECORDS = REGISTRY.counter(
+    "volara_reward_records", "Tweet records submitted as rewards"
+)
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "volara_api_request_duration_seconds",
+    "Latency of Volara API requests, per attempt",
+    ("path", "status"),
+)
+SCRAPE_REQUEST_SECONDS = REGISTRY.histogram(
+    "volara_scrape_request_duration_seconds",
+    "Latency of Twitter GraphQL requests",
+    ("operation", "status"),
+)
+SCRAPED_TWEETS = REGISTRY.counter(
+    "volara_scraped_tweets",
+    "Tweet texts used for validation, by whether they came from the cache",
+    ("source",),
+)
+VALIDATION_TWEETS = REGISTRY.counter(
+    "volara_validation_tweets",
+    "Sampled tweets checked against Twitter, by result",
+    ("result",),
+)
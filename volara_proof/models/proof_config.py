@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -9,3 +10,10 @@ class ProofConfig:
     volara_api_key: str
     file_id: str
     miner_address: str
+    batch_mode: bool = False
+    # JSON file mapping each input file name of a batch to its file_id and miner_address
+    batch_manifest: Optional[str] = None
+    # Where the stage timings of the proof are written, not written when None
+    trace_path: Optional[str] = None
+    # Also add a summary of the timings to the proof response metadata
+    trace_metadata: bool = False
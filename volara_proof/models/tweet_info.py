@@ -1,8 +1,102 @@
+import json
+import typing as T
 from dataclasses import dataclass
 
+import numpy as np
+
+# Numeric tweet IDs as stored on disk and held in tweet tables
+TWEET_ID_DTYPE = np.dtype("<u8")
+
 
 @dataclass(frozen=True, slots=True, order=True)
 class TweetInfo:
     tweet_id: str
     user_id: str
     score: float
+
+
+@dataclass(slots=True)
+class TweetInfoBatch:
+    """
+    Struct-of-arrays collection of TweetInfo: IDs as uint64 or fixed-width
+    bytes arrays and scores as a float64 array.
+    """
+
+    tweet_ids: np.ndarray
+    user_ids: np.ndarray
+    scores: np.ndarray
+
+    @classmethod
+    def from_infos(cls, tweet_info: T.Iterable[TweetInfo]) -> "TweetInfoBatch":
+        tweet_info = list(tweet_info)
+        return cls(
+            tweet_ids=np.array([tweet.tweet_id.encode() for tweet in tweet_info], dtype=np.bytes_),
+            user_ids=np.array([tweet.user_id.encode() for tweet in tweet_info], dtype=np.bytes_),
+            scores=np.array([tweet.score for tweet in tweet_info], dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, index: slice) -> "TweetInfoBatch":
+        return TweetInfoBatch(
+            tweet_ids=self.tweet_ids[index],
+            user_ids=self.user_ids[index],
+            scores=self.scores[index],
+        )
+
+    def __iter__(self) -> T.Iterator[TweetInfo]:
+        for tweet_id, user_id, score in zip(
+            id_strings(self.tweet_ids), id_strings(self.user_ids), self.scores.tolist()
+        ):
+            yield TweetInfo(tweet_id=tweet_id, user_id=user_id, score=score)
+
+    def total_score(self) -> float:
+        return float(self.scores.sum())
+
+    def records_json(self) -> str:
+        """Serializes the batch as the tweetRecords array of a reward submission."""
+        if not (_is_numeric(self.tweet_ids) and _is_numeric(self.user_ids)):
+            return json.dumps(
+                [
+                    {"tweetId": tweet.tweet_id, "userId": tweet.user_id, "ownershipScore": tweet.score}
+                    for tweet in self
+                ]
+            )
+        # Numeric IDs need no escaping, so records can be formatted directly
+        return "[" + ",".join(
+            f'{{"tweetId":"{tweet_id}","userId":"{user_id}","ownershipScore":{score!r}}}'
+            for tweet_id, user_id, score in zip(
+                id_strings(self.tweet_ids),
+                id_strings(self.user_ids),
+                self.scores.tolist(),
+            )
+        ) + "]"
+
+
+def id_strings(ids: np.ndarray) -> list[str]:
+    """Formats an ID column as strings, only done where IDs leave the process."""
+    if ids.dtype.kind == "S":
+        return [id.decode() for id in ids.tolist()]
+    return [str(id) for id in ids.tolist()]
+
+
+def tweet_ids_to_u64(tweet_ids: T.Sequence[bytes] | np.ndarray) -> T.Optional[np.ndarray]:
+    """
+    Parses numeric tweet IDs, None if any of them is not a valid uint64 that
+    formats back to the same ID (e.g. with a sign, spaces or leading zeros).
+    """
+    tweet_ids = np.asarray(tweet_ids, dtype=np.bytes_)
+    try:
+        numeric_ids = tweet_ids.astype(TWEET_ID_DTYPE)
+    except (ValueError, OverflowError):
+        return None
+    if not np.array_equal(numeric_ids.astype(np.bytes_), tweet_ids):
+        return None
+    return numeric_ids
+
+
+def _is_numeric(ids: np.ndarray) -> bool:
+    if ids.dtype.kind == "u":
+        return True
+    return bool(np.char.isdigit(ids).all()) if len(ids) else True
@@ -1,8 +1,11 @@
+import dataclasses
+import json
 import logging
 import os
 from typing import Dict, Any
 
 
+from volara_proof.metrics import REGISTRY
 from volara_proof.proofs.proof import proof
 from volara_proof.models.proof_response import ProofResponse
 from volara_proof.models.proof_config import ProofConfig
@@ -26,3 +29,102 @@ class Proof:
         output_message = proof(input_file, self.proof_response, self.config)
 
         return output_message
+
+    def generate_batch(self) -> Dict[str, ProofResponse | BaseException]:
+        """
+        Generate a proof for every file in the input directory, in parallel.
+        Each file is proven with the file ID and miner address of its entry in
+        the batch manifest. Failed files, and files without an entry, map to
+        the exception that was raised for them.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        manifest = load_manifest(self.config.batch_manifest)
+        input_filenames = sorted(os.listdir(self.config.input_dir))
+        logging.info(f"Starting batch proof generation for {len(input_filenames)} files")
+
+        results: Dict[str, ProofResponse | BaseException] = {}
+        for input_filename in input_filenames:
+            if input_filename not in manifest:
+                # Rewards must not go to the container's miner under a made-up file ID
+                results[input_filename] = ValueError(
+                    f"No entry for {input_filename} in the batch manifest"
+                )
+                logging.error(f"Skipping {input_filename}: not in the batch manifest")
+        input_filenames = [name for name in input_filenames if name in manifest]
+
+        with ProcessPoolExecutor(
+            max_workers=min(_available_cores(), len(input_filenames)) or 1
+        ) as executor:
+            futures = {
+                input_filename: executor.submit(
+                    _proof_in_worker,
+                    os.path.join(self.config.input_dir, input_filename),
+                    self.proof_response,
+                    self._file_config(input_filename, manifest[input_filename]),
+                )
+                for input_filename in input_filenames
+            }
+            for input_filename, future in futures.items():
+                try:
+                    result, metrics = future.result()
+                    REGISTRY.merge(metrics)
+                    if isinstance(result, BaseException):
+                        raise result
+                    results[input_filename] = result
+                except Exception as e:
+                    logging.exception(f"Failed to generate proof for {input_filename}")
+                    results[input_filename] = e
+        return dict(sorted(results.items()))
+
+    def _file_config(self, input_filename: str, entry: Dict[str, str]) -> ProofConfig:
+        """Config of one file in batch mode, traced next to its results."""
+        trace_path = self.config.trace_path
+        if trace_path:
+            trace_path = os.path.join(
+                os.path.dirname(trace_path), f"{input_filename}.trace.json"
+            )
+        return dataclasses.replace(
+            self.config,
+            file_id=entry["file_id"],
+            miner_address=entry["miner_address"],
+            trace_path=trace_path,
+        )
+
+
+def load_manifest(path: str | None) -> Dict[str, Dict[str, str]]:
+    """
+    Reads a batch manifest, a JSON object mapping input file names to
+    {"file_id": ..., "miner_address": ...}. Empty when there is none.
+    """
+    if not path:
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    for input_filename, entry in manifest.items():
+        check_job(entry, f"Batch manifest entry of {input_filename}")
+    return manifest
+
+
+def check_job(entry: Any, what: str) -> Dict[str, str]:
+    """Checks that a job names the file ID and miner address the rewards go to."""
+    if not isinstance(entry, dict) or not entry.get("file_id") or not entry.get("miner_address"):
+        raise ValueError(f"{what} needs a file_id and a miner_address")
+    return entry
+
+
+def _proof_in_worker(
+    input_file: str, proof_response: ProofResponse, config: ProofConfig
+) -> tuple[ProofResponse | BaseException, dict]:
+    """Proves one file in a pool worker, returning the worker's metrics with the result."""
+    try:
+        result = proof(input_file, proof_response, config)
+    except Exception as e:
+        result = e
+    return result, REGISTRY.drain()
+
+
+def _available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -1,31 +1,90 @@
+import asyncio
 import copy
+import functools
+import os
+import time
+import typing as T
 
-from volara_proof.extract import extract_data, extract_user_data
-from volara_proof.proofs.proof_of_quality import proof_of_quality
+from volara_proof.aio import run_sync
+from volara_proof.extract import ProfilePayload, read_archive
 from volara_proof.models.proof_response import ProofResponse
 from volara_proof.models.proof_config import ProofConfig
+from volara_proof.metrics import PROOFS, PROOF_SECONDS, PROOF_TWEETS
+from volara_proof.tracing import span, tracing
 
-from volara_proof.storage.rewards import RewardsStorage
-from volara_proof.storage.user_info import UserInfoStorage
+if T.TYPE_CHECKING:
+    from volara_proof.storage.rewards import AsyncRewardsStorage
+    from volara_proof.storage.user_info import AsyncUserInfoStorage
 
-rewards_storage = RewardsStorage()
-user_info_storage = UserInfoStorage()
+# The tweet path (NumPy, flatbuffers, the Twitter scraper) is only imported
+# once a file turns out to hold tweets, so profile uploads start quickly.
+
+
+@functools.cache
+def get_rewards_storage() -> "AsyncRewardsStorage":
+    from volara_proof.storage.rewards import AsyncRewardsStorage
+
+    return AsyncRewardsStorage()
+
+
+@functools.cache
+def get_user_info_storage() -> "AsyncUserInfoStorage":
+    from volara_proof.storage.user_info import AsyncUserInfoStorage
+
+    return AsyncUserInfoStorage()
 
 
 def proof(
     input_file: str, proof_response: ProofResponse, config: ProofConfig
+) -> ProofResponse:
+    return run_sync(proof_async(input_file, proof_response, config))
+
+
+async def proof_async(
+    input_file: str, proof_response: ProofResponse, config: ProofConfig
+) -> ProofResponse:
+    start = time.perf_counter()
+    outcome = "error"
+    with tracing() as trace:
+        try:
+            with span("proof", bytes=os.path.getsize(input_file)):
+                proof_response = await _proof(input_file, proof_response, config)
+            outcome = _outcome(proof_response)
+        finally:
+            PROOFS.inc(outcome=outcome)
+            PROOF_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+            if config.trace_path:
+                trace.write(config.trace_path)
+    if config.trace_metadata:
+        proof_response.metadata["trace"] = trace.summary()
+    return proof_response
+
+
+async def _proof(
+    input_file: str, proof_response: ProofResponse, config: ProofConfig
 ) -> ProofResponse:
     proof_response = copy.deepcopy(proof_response)
-    user_data = extract_user_data(input_file)
-    if user_data is not None:
-        validated_user = user_info_storage.verify_user(user_data)
+    with span("read_archive") as read_span:
+        payload = await asyncio.to_thread(read_archive, input_file)
+    if isinstance(payload, ProfilePayload):
+        user_data = payload.user_data
+        user_info_storage = get_user_info_storage()
+        with span("verify_user"):
+            validated_user = await user_info_storage.verify_user(user_data)
         proof_response.score = 50 / 10_000 if validated_user else 0
         proof_response.valid = validated_user
-        user_info_storage.process_profile(user_data)
+        with span("process_profile"):
+            await user_info_storage.process_profile(user_data)
         return proof_response
-    tweets_data = extract_data(input_file)
+
+    from volara_proof.proofs.proof_of_quality import proof_of_quality_async
+
+    tweets_data = payload.tweets_data
+    read_span.bytes = payload.size
+    read_span.items = tweets_data.TweetsLength()
+    PROOF_TWEETS.inc(read_span.items)
     is_valid, file_score, tweet_info, unique_tweets, total_tweets = (
-        proof_of_quality(tweets_data, config.file_id, config)
+        await proof_of_quality_async(tweets_data, config.file_id, config)
     ).values()
     proof_response.valid = is_valid
     proof_response.score = file_score
@@ -34,7 +93,14 @@ def proof(
     proof_response.quality = file_score
     proof_response.uniqueness = unique_tweets / total_tweets if total_tweets > 0 else 0
     if is_valid and file_score > 0:
-        rewards_storage.post_rewards(
-            config.file_id, config.miner_address, file_score, tweet_info
-        )
+        with span("post_rewards", items=len(tweet_info)):
+            await get_rewards_storage().post_rewards(
+                config.file_id, config.miner_address, file_score, tweet_info
+            )
     return proof_response
+
+
+def _outcome(proof_response: ProofResponse) -> str:
+    if not proof_response.valid:
+        return "invalid"
+    return "scored" if proof_response.score > 0 else "unscored"
@@ -1,24 +1,49 @@
+import asyncio
+import functools
 import typing as T
 import numpy as np
 import logging
 import json
-from random import sample
 
 import volara_proof.exceptions
 from volara_proof.buffers.tweets import Tweets
-from volara_proof.buffers.tweet import Tweet
-from volara_proof.models.tweet_info import TweetInfo
-from volara_proof.storage.tweet_info import TweetInfoStorage
+from volara_proof.proofs.tweet_table import TweetTable, build_tweet_table
+from volara_proof.proofs.sampling import SequentialSampler
+from volara_proof.proofs.scoring import get_scoring_engine
+from volara_proof.models.tweet_info import TweetInfoBatch, id_strings
+from volara_proof.aio import run_sync
+from volara_proof.storage.tweet_info import AsyncTweetInfoStorage
+from volara_proof.storage.seen_tweets import get_seen_tweet_index
+from volara_proof.storage.sampling_history import ContributorHistory, get_sampling_history
 from volara_proof.models.proof_config import ProofConfig
-from volara_proof.scraper.VolaraScraper import VolaraScraper
+from volara_proof.scraper.cache import get_scrape_cache
+from volara_proof.metrics import SCRAPED_TWEETS, VALIDATION_TWEETS
+from volara_proof.tracing import span
+
+if T.TYPE_CHECKING:
+    from volara_proof.scraper.VolaraScraper import VolaraScraper
 
 
 def get_scraper(config: ProofConfig):
-    cookies = json.loads(config.cookies)
-    return VolaraScraper(cookies=cookies)
+    return _get_scraper(config.cookies)
+
+
+@functools.cache
+def _get_scraper(cookies: str) -> "VolaraScraper":
+    """
+    One scraper per cookies config, reused across proofs in a process. The
+    config is either one cookie set or a list of them to spread requests over.
+    """
+    # twitter.scraper is slow to import and only needed once a sample is scraped
+    from volara_proof.scraper.VolaraScraper import VolaraScraper
+
+    cookie_sets = json.loads(cookies)
+    if isinstance(cookie_sets, list):
+        return VolaraScraper(cookies=cookie_sets[0], extra_cookies=cookie_sets[1:])
+    return VolaraScraper(cookies=cookie_sets)
 
 
-tweet_info_storage = TweetInfoStorage()
+tweet_info_storage = AsyncTweetInfoStorage()
 
 NIL_RESPONSE_INVALID = {
     "is_valid": False,
@@ -38,60 +63,117 @@ NIL_RESPONSE_VALID = {
 
 
 def proof_of_quality(tweets_data: Tweets, file_id: str, config: ProofConfig):
-    if not _no_duplicates(tweets_data):
+    return run_sync(proof_of_quality_async(tweets_data, file_id, config))
+
+
+async def proof_of_quality_async(
+    tweets_data: Tweets, file_id: str, config: ProofConfig
+):
+    with span("build_tweet_table", items=tweets_data.TweetsLength()):
+        tweet_table = await asyncio.to_thread(build_tweet_table, tweets_data)
+    if not _no_duplicates(tweet_table):
         return NIL_RESPONSE_INVALID
-    unique_tweets = _unique_tweets(tweets_data, file_id)
-    if len(unique_tweets) == 0:
+    with span("unique_tweets", items=len(tweet_table)):
+        unique_count = await _unique_tweets(tweet_table, file_id)
+    if unique_count == 0:
         return NIL_RESPONSE_VALID
-    tweets_validated = _validate_tweets(tweets_data, unique_tweets, config)
+    with span("validate_tweets", items=unique_count):
+        tweets_validated = await _validate_tweets(tweet_table, config)
     if not tweets_validated:
         return NIL_RESPONSE_INVALID
-    tweet_info = _score_tweets(tweets_data, unique_tweets)
-    file_score = min(sum([tweet.score for tweet in tweet_info]) / 100_000, 1)
+    with span("score_tweets", items=unique_count):
+        tweet_info = _score_tweets(tweet_table)
+    file_score = min(tweet_info.total_score() / 100_000, 1)
     return {
         "is_valid": True,
         "file_score": file_score,
         "tweet_info": tweet_info,
-        "unique_tweets": len(unique_tweets),
-        "total_tweets": tweets_data.TweetsLength(),
+        "unique_tweets": unique_count,
+        "total_tweets": len(tweet_table),
     }
 
 
-def _validate_tweets(
-    tweets_data: Tweets, unique_tweets: T.Set[str], config: ProofConfig
-):
-    unique_tweet_data = [
-        tweets_data.Tweets(i)
-        for i in range(tweets_data.TweetsLength())
-        if tweets_data.Tweets(i).TweetId().decode() in unique_tweets
-    ]
-
-    # Sampling 10 tweets gives us ~65% confidence at 10% malicious rate
-    sample_count = _calc_confidence(0.65, 0.1, len(unique_tweet_data))
-    tweet_sample = sample(range(len(unique_tweet_data)), sample_count)
-
-    tweet_ids = [unique_tweet_data[i].TweetId().decode() for i in tweet_sample]
-    scraped_tweets = _scrape_tweets(tweet_ids, config)
-
-    for tweet_data_i, tweet in zip(tweet_sample, scraped_tweets):
-        if "result" not in tweet:  # Does this allow fake tweet attacks?
-            continue
-        typename = tweet["result"]["__typename"]
-        if typename == "TweetUnavailable":
-            continue
-        if "tweet" in tweet["result"]:
-            text = tweet["result"]["tweet"]["legacy"]["full_text"]
-        else:
-            text = tweet["result"]["legacy"]["full_text"]
-        if text != unique_tweet_data[tweet_data_i].Text().decode():
-            return False
-    return True
-
-
-def _scrape_tweets(tweet_ids: list[str], config: ProofConfig) -> list[dict[str, T.Any]]:
+async def _validate_tweets(tweet_table: TweetTable, config: ProofConfig):
+    """
+    Checks randomly drawn unique tweets against their scraped texts, in rounds
+    sized by the sampler, and records the result in the contributor's history.
+    """
+    columns = tweet_table.columns
+    history = get_sampling_history() if config.miner_address else None
+    sampler = SequentialSampler(
+        len(tweet_table.unique_positions()),
+        history.get(config.miner_address) if history else ContributorHistory(),
+    )
+    draws = np.random.default_rng().permutation(tweet_table.unique_positions())
+
+    while count := sampler.next_round():
+        tweet_sample = draws[sampler.sampled : sampler.sampled + count]
+        tweet_ids = id_strings(tweet_table.tweet_ids[tweet_sample])
+        with span("scrape_texts", items=len(tweet_ids)):
+            scraped_texts = await _scrape_texts(tweet_ids, config)
+        for tweet_data_i, tweet_id in zip(tweet_sample.tolist(), tweet_ids):
+            # Deleted, protected or unknown to Twitter, no evidence either way
+            text = scraped_texts.get(tweet_id)
+            if text is None:
+                sampler.record(unavailable=1)
+            elif text != columns.text(tweet_data_i).decode():
+                sampler.record(mismatched=1)
+                break
+            else:
+                sampler.record(verified=1)
+
+    VALIDATION_TWEETS.inc(sampler.verified, result="verified")
+    VALIDATION_TWEETS.inc(sampler.unavailable, result="unavailable")
+    VALIDATION_TWEETS.inc(sampler.mismatched, result="mismatched")
+    if history:
+        history.add(config.miner_address, sampler.verified, sampler.mismatched)
+    logging.info(
+        f"Sampled {sampler.sampled} tweets in {sampler.rounds} rounds: "
+        f"{sampler.verified} verified, {sampler.unavailable} unavailable, "
+        f"{sampler.mismatched} mismatched, confidence {sampler.confidence():.3f}"
+    )
+    return sampler.valid
+
+
+async def _scrape_texts(
+    tweet_ids: list[str], config: ProofConfig
+) -> dict[str, T.Optional[str]]:
+    """
+    Full text of each tweet, None if it is unavailable. Tweets the scraper
+    returned no result for are left out. Cached texts are not scraped again.
+    """
+    cache = get_scrape_cache()
+    texts = cache.get_many(tweet_ids) if cache else {}
+    missing = [tweet_id for tweet_id in tweet_ids if tweet_id not in texts]
+    SCRAPED_TWEETS.inc(len(texts), source="cache")
+    SCRAPED_TWEETS.inc(len(missing), source="scraper")
+    if missing:
+        scraped_texts = {
+            tweet_id: _full_text(tweet)
+            for tweet_id, tweet in zip(missing, await _scrape_tweets(missing, config))
+            if "result" in tweet
+        }
+        if cache:
+            cache.put_many(scraped_texts)
+        texts.update(scraped_texts)
+    return texts
+
+
+def _full_text(tweet: dict[str, T.Any]) -> T.Optional[str]:
+    typename = tweet["result"]["__typename"]
+    if typename == "TweetUnavailable":
+        return None
+    if "tweet" in tweet["result"]:
+        return tweet["result"]["tweet"]["legacy"]["full_text"]
+    return tweet["result"]["legacy"]["full_text"]
+
+
+async def _scrape_tweets(
+    tweet_ids: list[str], config: ProofConfig
+) -> list[dict[str, T.Any]]:
     try:
         scraper = get_scraper(config)
-        tweets = scraper.get_tweets_by_ids(tweet_ids)
+        tweets = await scraper.get_tweets_by_ids_async(tweet_ids)
         return tweets
     except Exception as e:
         logging.exception(
@@ -100,54 +182,39 @@ def _scrape_tweets(tweet_ids: list[str], config: ProofConfig) -> list[dict[str,
         raise volara_proof.exceptions.VolaraApiServerException(e)
 
 
-def _no_duplicates(tweets_data: Tweets) -> bool:
-    tweet_ids: set[bytes] = set()
-    for i in range(tweets_data.TweetsLength()):
-        if tweets_data.Tweets(i).TweetId() in tweet_ids:
-            return False
-        tweet_ids.add(tweets_data.Tweets(i).TweetId())
-    return True
-
-
-def _unique_tweets(tweets_data: Tweets, file_id: str) -> T.Set[str]:
-    tweet_ids = [
-        str(tweets_data.Tweets(i).TweetId().decode())
-        for i in range(tweets_data.TweetsLength())
-    ]
-    tweet_id_existance = tweet_info_storage.get(tweet_ids, file_id)
-    unique_tweets = set(
-        [
-            tweet_id
-            for tweet_id, exists in zip(tweet_ids, tweet_id_existance)
-            if not exists
-        ]
-    )
-    return unique_tweets
+def _no_duplicates(tweet_table: TweetTable) -> bool:
+    return not tweet_table.has_duplicates
 
 
-def _form_tweet_info(tweet: T.Optional[Tweet], score: float) -> TweetInfo:
-    if tweet is None:
-        raise Exception("Invalid none tweet")
-    return TweetInfo(
-        tweet_id=tweet.TweetId().decode(),
-        user_id=tweet.UserId().decode(),
-        score=score,
+async def _unique_tweets(tweet_table: TweetTable, file_id: str) -> int:
+    """
+    Fills in the unique mask of the table and returns the number of unique tweets.
+    IDs the local seen index already knows are not sent to the API.
+    """
+    tweet_ids = tweet_table.tweet_ids
+    seen_index = get_seen_tweet_index() if tweet_table.numeric_ids else None
+    if seen_index is not None:
+        exists = seen_index.contains(tweet_ids)
+    else:
+        exists = np.zeros(len(tweet_ids), dtype=bool)
+
+    lookup_positions = np.flatnonzero(~exists)
+    exists[lookup_positions] = await tweet_info_storage.get(
+        tweet_ids[lookup_positions], file_id
     )
+    if seen_index is not None:
+        seen_index.add(tweet_ids[lookup_positions][exists[lookup_positions]])
 
+    tweet_table.unique_mask = ~exists
+    return int(tweet_table.unique_mask.sum())
 
-def _score_tweets(tweets_data: Tweets, unique_tweets: T.Set[str]) -> list[TweetInfo]:
-    # TODO: Evaluate dynamic score
-    scored_tweets: list[TweetInfo] = []
-    for i in range(tweets_data.TweetsLength()):
-        if tweets_data.Tweets(i).TweetId().decode() not in unique_tweets:
-            continue
-        scored_tweets.append(_form_tweet_info(tweets_data.Tweets(i), 10))
-    return scored_tweets
 
+def _score_tweets(tweet_table: TweetTable) -> TweetInfoBatch:
+    columns = tweet_table.columns
+    positions = tweet_table.unique_positions()
+    return TweetInfoBatch(
+        tweet_ids=tweet_table.tweet_ids[positions],
+        user_ids=columns.user_ids[positions],
+        scores=get_scoring_engine().score(columns, positions),
+    )
 
-def _calc_confidence(
-    desired_confidence: float, malicious_rate: float, sample_size: int
-):
-    if sample_size < 100:
-        return 1
-    return int(np.ceil(np.log(1 - desired_confidence) / np.log(1 - malicious_rate)))
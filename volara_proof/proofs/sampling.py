@@ -0,0 +1,127 @@
+"""
+Sequential sampling of unique tweets for validation against Twitter
+"""
+
+import math
+import typing as T
+from dataclasses import dataclass
+
+from volara_proof.constants import (
+    SAMPLING_CONFIDENCE,
+    SAMPLING_MALICIOUS_RATE,
+    SAMPLING_MAX_REPLACEMENTS,
+    SAMPLING_MAX_TWEETS,
+    SAMPLING_MAX_UNAVAILABLE,
+    SAMPLING_ROUND_SIZE,
+)
+from volara_proof.storage.sampling_history import ContributorHistory
+
+
+@dataclass(frozen=True)
+class SamplingPolicy:
+    confidence: float = SAMPLING_CONFIDENCE
+    malicious_rate: float = SAMPLING_MALICIOUS_RATE
+    round_size: int = SAMPLING_ROUND_SIZE
+    max_tweets: int = SAMPLING_MAX_TWEETS
+    max_unavailable: float = SAMPLING_MAX_UNAVAILABLE
+    # Draws replacing unavailable tweets, as a multiple of the sample size
+    max_replacements: float = SAMPLING_MAX_REPLACEMENTS
+    # A contributor's past tweets weigh at most as much as this many sampled ones
+    history_weight: int = 10
+
+    def target_confidence(self, population: int) -> float:
+        """The chance of missing fake tweets halves for every 10x unique tweets past 100."""
+        miss = 1 - self.confidence
+        if population > 100:
+            miss /= 2 ** math.log10(population / 100)
+        return 1 - miss
+
+    def prior(self, history: ContributorHistory) -> tuple[int, int]:
+        """Fake and genuine pseudo-counts of the Beta prior on the fake tweet rate."""
+        fake, genuine = history.mismatched, history.verified
+        total = fake + genuine
+        if total > self.history_weight:
+            # A past mismatch is never scaled away
+            fake = math.ceil(fake * self.history_weight / total)
+            genuine = max(self.history_weight - fake, 0)
+        return 1 + fake, 1 + genuine
+
+
+class SequentialSampler:
+    """
+    Decides after every round of scraped tweets whether another round can
+    change the outcome. Sampling stops at the first mismatch, once the
+    posterior probability that at most `malicious_rate` of the tweets are fake
+    reaches the target, or when the tweet budget is spent. Unavailable tweets
+    are counted but are no evidence either way. Replacements are only drawn
+    when unavailable tweets can reject the file, and at most
+    `max_replacements` times the sample size the target asks for.
+    """
+
+    def __init__(
+        self,
+        population: int,
+        history: ContributorHistory = ContributorHistory(),
+        policy: T.Optional[SamplingPolicy] = None,
+    ):
+        self.policy = policy or SamplingPolicy()
+        self.population = population
+        self.budget = min(population, self.policy.max_tweets)
+        self.target = self.policy.target_confidence(population)
+        self.prior_fake, self.prior_genuine = self.policy.prior(history)
+        self.verified = 0
+        self.unavailable = 0
+        self.mismatched = 0
+        self.rounds = 0
+        # Draws when every sampled tweet is verified, plus replacements
+        sample_size = self._needed(self.budget)
+        replacements = 0
+        if self.policy.max_unavailable < 1:
+            replacements = math.ceil(self.policy.max_replacements * sample_size)
+        self.draws = min(self.budget, sample_size + replacements)
+
+    @property
+    def sampled(self) -> int:
+        return self.verified + self.unavailable + self.mismatched
+
+    def confidence(self, verified: T.Optional[int] = None) -> float:
+        verified = self.verified if verified is None else verified
+        if self.mismatched:
+            return 0.0
+        if verified >= self.population:
+            return 1.0
+        # Beta(a, b) CDF at the malicious rate, for integer a and b it is the
+        # probability of at least a successes in a + b - 1 Bernoulli trials
+        a = self.prior_fake
+        n = a + self.prior_genuine + verified - 1
+        p = self.policy.malicious_rate
+        return 1 - sum(math.comb(n, j) * p**j * (1 - p) ** (n - j) for j in range(a))
+
+    def next_round(self) -> int:
+        """Tweets to scrape in the next round, 0 once the outcome is decided."""
+        left = self.draws - self.sampled
+        if self.mismatched or left <= 0 or self._too_many_unavailable(self.draws):
+            return 0
+        if self.sampled and self.confidence() >= self.target:
+            return 0
+        self.rounds += 1
+        return min(self._needed(left), self.policy.round_size, left)
+
+    def record(self, verified: int = 0, unavailable: int = 0, mismatched: int = 0) -> None:
+        self.verified += verified
+        self.unavailable += unavailable
+        self.mismatched += mismatched
+
+    def _needed(self, left: int) -> int:
+        """Verified tweets still needed to reach the target, at most `left`."""
+        needed = 1
+        while needed < left and self.confidence(self.verified + needed) < self.target:
+            needed += 1
+        return needed
+
+    @property
+    def valid(self) -> bool:
+        return not self.mismatched and not self._too_many_unavailable(self.sampled)
+
+    def _too_many_unavailable(self, sampled: int) -> bool:
+        return sampled > 0 and self.unavailable > self.policy.max_unavailable * sampled
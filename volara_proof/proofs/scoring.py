@@ -0,0 +1,76 @@
+"""
+Scoring engines computing per-tweet scores in NumPy batches
+"""
+
+import typing as T
+from dataclasses import dataclass
+
+import numpy as np
+
+from volara_proof.buffers.tweet_columns import TweetColumns
+from volara_proof.constants import SCORING_ENGINE
+
+
+class ScoringEngine(T.Protocol):
+    def score(self, columns: TweetColumns, positions: np.ndarray) -> np.ndarray:
+        """Returns the float64 score of each tweet at `positions`."""
+        ...
+
+
+@dataclass(frozen=True)
+class FlatScorer:
+    tweet_score: float = 10
+
+    def score(self, columns: TweetColumns, positions: np.ndarray) -> np.ndarray:
+        return np.full(len(positions), self.tweet_score, dtype=np.float64)
+
+
+@dataclass(frozen=True)
+class EngagementScorer:
+    """
+    Base score plus a capped, weighted engagement bonus, decayed by tweet age
+    with the given half-life and capped again per tweet. Ages are in seconds
+    (created_at is Unix seconds) before `reference_time`, which defaults to
+    the newest tweet of the file so scores do not depend on when the proof runs.
+    """
+
+    base_score: float = 10
+    like_weight: float = 0.01
+    retweet_weight: float = 0.05
+    reply_weight: float = 0.02
+    quote_weight: float = 0.05
+    engagement_cap: float = 40
+    half_life: float = 30 * 24 * 60 * 60
+    max_score: float = 50
+    reference_time: T.Optional[float] = None
+
+    def score(self, columns: TweetColumns, positions: np.ndarray) -> np.ndarray:
+        engagement = (
+            self.like_weight * columns.likes[positions]
+            + self.retweet_weight * columns.retweets[positions]
+            + self.reply_weight * columns.replies[positions]
+            + self.quote_weight * columns.quotes[positions]
+        )
+        np.clip(engagement, 0, self.engagement_cap, out=engagement)
+        reference_time = self.reference_time
+        if reference_time is None:
+            reference_time = float(columns.created_at.max(initial=0))
+        age = np.maximum(
+            reference_time - columns.created_at[positions].astype(np.float64), 0
+        )
+        scores = (self.base_score + engagement) * np.exp2(-age / self.half_life)
+        return np.minimum(scores, self.max_score, out=scores)
+
+
+SCORING_ENGINES: dict[str, T.Callable[[], ScoringEngine]] = {
+    "flat": FlatScorer,
+    "engagement": EngagementScorer,
+}
+
+
+def get_scoring_engine(name: str = SCORING_ENGINE) -> ScoringEngine:
+    if name not in SCORING_ENGINES:
+        raise ValueError(
+            f"Unknown scoring engine {name}, expected one of {list(SCORING_ENGINES)}"
+        )
+    return SCORING_ENGINES[name]()
@@ -0,0 +1,50 @@
+"""
+Indexed tweet table shared by every proof_of_quality stage
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from volara_proof.buffers.tweets import Tweets
+from volara_proof.buffers.tweet_columns import TweetColumns, decode_tweets
+from volara_proof.exceptions import InvalidArchiveException
+from volara_proof.models.tweet_info import tweet_ids_to_u64
+
+
+@dataclass(slots=True)
+class TweetTable:
+    columns: TweetColumns
+    # uint64 when every tweet ID is numeric, else the fixed-width bytes column
+    tweet_ids: np.ndarray
+    has_duplicates: bool
+    unique_mask: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def numeric_ids(self) -> bool:
+        return self.tweet_ids.dtype.kind == "u"
+
+    def unique_positions(self) -> np.ndarray:
+        return np.flatnonzero(self.unique_mask)
+
+
+def build_tweet_table(tweets_data: Tweets) -> TweetTable:
+    """
+    Decodes the buffer and indexes it in a single walk. The unique mask
+    starts empty and is filled in by the uniqueness stage.
+    """
+    columns = decode_tweets(tweets_data)
+    if not columns.tweet_ids.all():
+        missing = int(np.argmin(columns.tweet_ids.astype(bool)))
+        raise InvalidArchiveException(f"Malformed tweets.data: tweet {missing} has no tweet_id")
+    numeric_ids = tweet_ids_to_u64(columns.tweet_ids)
+    tweet_ids = columns.tweet_ids if numeric_ids is None else numeric_ids
+    return TweetTable(
+        columns=columns,
+        tweet_ids=tweet_ids,
+        has_duplicates=len(np.unique(tweet_ids)) != len(tweet_ids),
+        unique_mask=np.zeros(len(columns), dtype=bool),
+    )
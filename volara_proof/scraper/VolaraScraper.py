@@ -1,101 +1,137 @@
-import math
-import requests
+import asyncio
+import time
+import typing as T
+import weakref
+
+import httpx
 
 from twitter.scraper import Scraper, Operation, batch_ids
-from twitter.util import get_headers, build_params, find_key, get_cursor
+from twitter.util import get_headers, build_params
+
+from volara_proof.aio import run_sync
+from volara_proof.constants import (
+    TWITTER_API_URL,
+    TWITTER_SCRAPE_CONCURRENCY,
+    TWITTER_SCRAPE_TIMEOUT,
+)
+from volara_proof.scraper.rate_limiter import RateLimitScheduler
+from volara_proof.metrics import SCRAPE_REQUEST_SECONDS
+from volara_proof.tracing import record_http
 
 
 class VolaraScraper(Scraper):
-    def get_tweets_by_ids(self, tweet_ids: list[str]):
+    def __init__(
+        self,
+        *args,
+        extra_cookies: T.Sequence[dict] = (),
+        api_url: str = TWITTER_API_URL,
+        **kwargs,
+    ):
+        """
+        Requests are spread over the session of `cookies` and one more session
+        per cookie set in `extra_cookies`, according to their rate limits.
+        Extra cookie sets must be logged in, only the first session may be a
+        guest session.
+        """
+        super().__init__(*args, **kwargs)
+        self.api_url = api_url
+        for i, cookies in enumerate(extra_cookies, start=1):
+            if not all(cookies.get(c) for c in ("ct0", "auth_token")):
+                raise ValueError(f"Cookie set {i} needs ct0 and auth_token cookies")
+        self.sessions = [self.session] + [
+            httpx.Client(cookies=cookies) for cookies in extra_cookies
+        ]
+        self.scheduler = RateLimitScheduler(len(self.sessions))
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, list[httpx.AsyncClient]
+        ] = weakref.WeakKeyDictionary()
+
+    def get_tweets_by_ids(self, tweet_ids: list[str]) -> list[dict[str, T.Any]]:
+        return run_sync(self.get_tweets_by_ids_async(tweet_ids))
+
+    async def get_tweets_by_ids_async(
+        self, tweet_ids: list[str]
+    ) -> list[dict[str, T.Any]]:
+        """
+        Fetches every batch of IDs concurrently and returns one tweetResult per
+        requested ID, in request order. IDs without a result map to {}.
+        """
         operation = Operation.TweetResultsByRestIds
-        queries = list(batch_ids(tweet_ids))
         keys, _, _ = operation
-        _queries = [{k: q} for q in queries for k, v in keys.items()]
-        resp = self._process_sync(operation, _queries)
-        scraped_tweets = resp[0][0].json()
-        return scraped_tweets["data"]["tweetResult"]
+        batches = batch_ids(tweet_ids)
+        responses = await asyncio.gather(
+            *(
+                self._scheduled_query(operation, **{k: batch})
+                for batch in batches
+                for k in keys
+            )
+        )
+        scraped_tweets = []
+        for batch, resp in zip(batches, responses):
+            resp.raise_for_status()
+            results = resp.json()["data"]["tweetResult"]
+            scraped_tweets.extend(_align_results(batch, results))
+        return scraped_tweets
 
-    def _process_sync(self, operation: tuple, queries: list[dict], **kwargs):
-        headers = self.session.headers if self.guest else get_headers(self.session)
-        cookies = self.session.cookies
-        return [
-            self._paginate_sync(dict(headers), dict(cookies), operation, **q, **kwargs)
-            for q in queries
-        ]
+    def client(self, session: int = 0) -> httpx.AsyncClient:
+        """Connection pool of one session, reused by every scrape on the running loop."""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            clients = [
+                self._build_client(session, guest=self.guest and i == 0)
+                for i, session in enumerate(self.sessions)
+            ]
+            self._clients[loop] = clients
+        return clients[session]
 
-    def _paginate_sync(
-        self,
-        headers: dict[str, str],
-        cookies: dict[str, str],
-        operation: tuple,
-        **kwargs,
-    ):
-        limit = kwargs.pop("limit", math.inf)
-        cursor = kwargs.pop("cursor", None)
-        is_resuming = False
-        dups = 0
-        DUP_LIMIT = 3
-        if cursor:
-            is_resuming = True
-            res = []
-            ids = set()
-        else:
-            try:
-                r = self._query_sync(operation, headers, cookies, **kwargs)
-                initial_data = r.json()
-                res = [r]
-                ids = {x for x in find_key(initial_data, "rest_id") if x[0].isnumeric()}
+    def _build_client(self, session, guest: bool = False) -> httpx.AsyncClient:
+        headers = session.headers if guest else get_headers(session)
+        return httpx.AsyncClient(
+            headers=dict(headers),
+            cookies=dict(session.cookies),
+            limits=httpx.Limits(max_connections=TWITTER_SCRAPE_CONCURRENCY),
+            timeout=TWITTER_SCRAPE_TIMEOUT,
+            # As the requests session did, e.g. twitter.com redirecting to x.com
+            follow_redirects=True,
+        )
 
-                cursor = get_cursor(initial_data)
-            except Exception as e:
-                if self.debug:
-                    self.logger.error(f"Failed to get initial pagination data: {e}")
-                return
-        while (dups < DUP_LIMIT) and cursor:
-            prev_len = len(ids)
-            if prev_len >= limit:
-                break
+    async def _scheduled_query(self, operation: tuple, **kwargs) -> httpx.Response:
+        """
+        Runs the query on the session the scheduler picks. A rate limited
+        response is retried once on every session before it is returned.
+        """
+        _, _, name = operation
+        for _ in range(len(self.sessions) + 1):
+            session = await self.scheduler.acquire(name)
+            resp = None
             try:
-                r = self._query_sync(
-                    operation, headers, cookies, cursor=cursor, **kwargs
-                )
-                data = r.json()
-            except Exception as e:
-                if self.debug:
-                    self.logger.error(f"Failed to get pagination data\n{e}")
-                return
-            cursor = get_cursor(data)
-            ids |= {x for x in find_key(data, "rest_id") if x[0].isnumeric()}
-
-            if self.debug:
-                self.logger.debug(f"Unique results: {len(ids)}\tcursor: {cursor}")
-            if prev_len == len(ids):
-                dups += 1
-            res.append(r)
-        if is_resuming:
-            return res, cursor
-        return res
+                resp = await self._query(self.client(session), operation, **kwargs)
+            finally:
+                self.scheduler.release(session, name, resp)
+            if resp.status_code != 429:
+                break
+        return resp
 
-    def _query_sync(
-        self,
-        operation: tuple,
-        headers: dict[str, str],
-        cookies: dict[str, str],
-        **kwargs,
-    ) -> requests.Response:
+    async def _query(
+        self, client: httpx.AsyncClient, operation: tuple, **kwargs
+    ) -> httpx.Response:
         keys, qid, name = operation
         params = {
             "variables": Operation.default_variables | kwargs,
             "features": Operation.default_features,
         }
         params = build_params(params)
-        resp = requests.get(
-            f"https://twitter.com/i/api/graphql/{qid}/{name}",
-            params=params,
-            headers=headers,
-            cookies=cookies,
-            timeout=20,
-        )
+        path = f"/i/api/graphql/{qid}/{name}"
+        start = time.perf_counter()
+        resp = None
+        try:
+            resp = await client.get(f"{self.api_url}{path}", params=params)
+        finally:
+            seconds = time.perf_counter() - start
+            status = resp.status_code if resp is not None else None
+            record_http("GET", path, status, seconds)
+            SCRAPE_REQUEST_SECONDS.observe(seconds, operation=name, status=status or "error")
         try:
             self.rate_limits[name] = {
                 k: int(v) for k, v in resp.headers.items() if "rate-limit" in k
@@ -103,3 +139,18 @@ class VolaraScraper(Scraper):
         except Exception as e:
             self.logger.debug(f"{e}")
         return resp
+
+
+def _align_results(
+    tweet_ids: list[str], results: list[dict[str, T.Any]]
+) -> list[dict[str, T.Any]]:
+    # Results normally come back positionally, fall back to matching on rest_id
+    if len(results) == len(tweet_ids):
+        return results
+    by_id = {}
+    for result in results:
+        tweet = result.get("result", {})
+        rest_id = tweet.get("rest_id") or tweet.get("tweet", {}).get("rest_id")
+        if rest_id is not None:
+            by_id[rest_id] = result
+    return [by_id.get(tweet_id, {}) for tweet_id in tweet_ids]
@@ -0,0 +1,69 @@
+import functools
+import sqlite3
+import time
+import typing as T
+
+from volara_proof.constants import (
+    SCRAPE_CACHE_PATH,
+    SCRAPE_CACHE_TTL,
+    SCRAPE_CACHE_MAX_ENTRIES,
+)
+
+
+class ScrapeCache:
+    """
+    On-disk cache of scraped tweet texts keyed by tweet ID. A NULL text marks
+    a tweet Twitter reported as unavailable. Entries expire after `ttl`
+    seconds and the least recently used ones are evicted past `max_entries`.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS tweets ("
+            "tweet_id TEXT PRIMARY KEY, text TEXT, fetched_at REAL, accessed_at REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS tweets_lru ON tweets (accessed_at)")
+
+    def get_many(self, tweet_ids: list[str]) -> dict[str, T.Optional[str]]:
+        if not tweet_ids:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(tweet_ids))
+        rows = self.db.execute(
+            f"SELECT tweet_id, text FROM tweets WHERE tweet_id IN ({placeholders}) AND fetched_at > ?",
+            (*tweet_ids, now - self.ttl),
+        ).fetchall()
+        self.db.executemany(
+            "UPDATE tweets SET accessed_at = ? WHERE tweet_id = ?",
+            [(now, tweet_id) for tweet_id, _ in rows],
+        )
+        return dict(rows)
+
+    def put_many(self, texts: dict[str, T.Optional[str]]) -> None:
+        if not texts:
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO tweets VALUES (?, ?, ?, ?)",
+                [(tweet_id, text, now, now) for tweet_id, text in texts.items()],
+            )
+            self.db.execute("DELETE FROM tweets WHERE fetched_at <= ?", (now - self.ttl,))
+            self.db.execute(
+                "DELETE FROM tweets WHERE tweet_id IN ("
+                "SELECT tweet_id FROM tweets ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+@functools.cache
+def get_scrape_cache() -> T.Optional[ScrapeCache]:
+    if not SCRAPE_CACHE_PATH:
+        return None
+    return ScrapeCache(SCRAPE_CACHE_PATH, SCRAPE_CACHE_TTL, SCRAPE_CACHE_MAX_ENTRIES)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import typing as T
+from dataclasses import dataclass
+
+import httpx
+
+import volara_proof.exceptions
+from volara_proof.constants import TWITTER_RATE_LIMIT_MAX_WAIT
+
+# Assumed window when a 429 comes back without a reset header
+_DEFAULT_WINDOW = 15 * 60
+
+
+@dataclass
+class _Quota:
+    remaining: T.Optional[int] = None
+    reset_at: float = 0.0
+    in_flight: int = 0
+
+    def available(self, now: float) -> float:
+        if self.remaining is None or self.reset_at <= now:
+            return float("inf")
+        return self.remaining - self.in_flight
+
+
+class RateLimitScheduler:
+    """
+    Tracks the x-rate-limit-* quota of every GraphQL operation per cookie set
+    and hands each request to the session with the most quota left. Ties, e.g.
+    before any quota is known, go to the session with the fewest requests in
+    flight and then round-robin. When all sessions are exhausted, requests
+    wait for the earliest reset instead of failing, unless that is further
+    away than TWITTER_RATE_LIMIT_MAX_WAIT.
+    """
+
+    def __init__(self, session_count: int = 1):
+        self.session_count = session_count
+        self._quotas: dict[tuple[int, str], _Quota] = {}
+        self._next = 0
+
+    async def acquire(self, operation: str) -> int:
+        deadline = time.time() + TWITTER_RATE_LIMIT_MAX_WAIT
+        while True:
+            now = time.time()
+            quotas = [self._quota(i, operation) for i in range(self.session_count)]
+            # max keeps the first of equal sessions, so start at the next in turn
+            order = [(self._next + i) % self.session_count for i in range(self.session_count)]
+            session = max(
+                order, key=lambda i: (quotas[i].available(now), -quotas[i].in_flight)
+            )
+            if quotas[session].available(now) > 0:
+                quotas[session].in_flight += 1
+                self._next = (session + 1) % self.session_count
+                return session
+            reset_at = min(quota.reset_at for quota in quotas)
+            if reset_at > deadline:
+                raise volara_proof.exceptions.TwitterScrapeException(
+                    f"Rate limit for {operation} resets in {reset_at - now:.0f}s"
+                )
+            await asyncio.sleep(max(reset_at - now, 0.05))
+
+    def release(
+        self, session: int, operation: str, resp: T.Optional[httpx.Response]
+    ) -> None:
+        quota = self._quota(session, operation)
+        quota.in_flight -= 1
+        if resp is None:
+            return
+        headers = resp.headers
+        if "x-rate-limit-remaining" in headers:
+            quota.remaining = int(headers["x-rate-limit-remaining"])
+        if "x-rate-limit-reset" in headers:
+            quota.reset_at = float(headers["x-rate-limit-reset"])
+        if resp.status_code == 429:
+            quota.remaining = 0
+            if quota.reset_at <= time.time():
+                quota.reset_at = time.time() + _DEFAULT_WINDOW
+
+    def _quota(self, session: int, operation: str) -> _Quota:
+        return self._quotas.setdefault((session, operation), _Quota())
@@ -0,0 +1,353 @@
+"""
+Long-lived validator. Proof jobs come from a spool directory and/or a Unix
+socket and are proven on one event loop, so imports, Volara API connection
+pools and scraper sessions stay warm from one file to the next.
+
+The spool directory holds:
+    incoming/    archives to prove, moved in atomically (e.g. with rename)
+                 after their <archive>.job.json
+    processing/  one <server id>/ directory per server with the archives it
+                 is proving, locked by <server id>.lock while the server runs.
+                 Archives of servers that died, or of an earlier run with the
+                 same ID, are moved back to incoming/
+    done/        archives that were proven
+    failed/      archives that could not be proven
+    results/     <archive>.results.json of every archive
+
+<archive>.job.json is a JSON object {"file_id": ..., "miner_address": ...}
+naming who the rewards of the archive go to, it moves along with the
+archive. Over the socket, every line is a JSON job
+{"input_file": ..., "file_id": ..., "miner_address": ...} answered by one
+JSON line holding either "result" or "error".
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import fcntl
+import json
+import logging
+import os
+import signal
+import socket
+import tempfile
+import typing as T
+
+from volara_proof.constants import (
+    METRICS_PATH,
+    SERVER_CONCURRENCY,
+    SERVER_MAX_PENDING,
+    SPOOL_POLL_INTERVAL,
+)
+from volara_proof.metrics import REGISTRY
+from volara_proof.models.proof_config import ProofConfig
+from volara_proof.models.proof_response import ProofResponse
+from volara_proof.proof import check_job
+from volara_proof.proofs.proof import proof_async
+
+SPOOL_SUBDIRS = ("incoming", "processing", "done", "failed", "results")
+JOB_SUFFIX = ".job.json"
+
+
+class ProofServer:
+    def __init__(
+        self,
+        config: ProofConfig,
+        spool_dir: T.Optional[str] = None,
+        socket_path: T.Optional[str] = None,
+        concurrency: int = SERVER_CONCURRENCY,
+        max_pending: int = SERVER_MAX_PENDING,
+    ):
+        """
+        At most `concurrency` proofs run at once. Spooled archives are only
+        claimed when a slot is free, socket jobs past `max_pending` waiting or
+        running ones are turned away so clients can back off.
+        """
+        if spool_dir is None and socket_path is None:
+            raise ValueError("A spool directory or a socket path is required")
+        self.config = config
+        self.spool_dir = spool_dir
+        self.socket_path = socket_path
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.proof_response = ProofResponse(
+            dlp_id=config.dlp_id, metadata={"dlp_id": config.dlp_id}
+        )
+        self._pending = 0
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.server_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._lock: T.Optional[T.TextIO] = None
+
+    async def serve(self) -> None:
+        """Serves until SIGTERM or SIGINT, then finishes the proofs in flight."""
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._stopping = asyncio.Event()
+        # Set when the spool should be scanned before the next poll is due
+        self._wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        spool_task = None
+        if self.spool_dir is not None:
+            self._recover_spool()
+            spool_task = asyncio.create_task(self._poll_spool())
+        socket_server = None
+        if self.socket_path is not None:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            socket_server = await asyncio.start_unix_server(
+                self._handle_connection, path=self.socket_path
+            )
+        logging.info(
+            f"Serving proofs from spool {self.spool_dir} and socket {self.socket_path} "
+            f"with concurrency {self.concurrency}"
+        )
+
+        await self._stopping.wait()
+        logging.info("Stopping, waiting for proofs in flight")
+        if socket_server is not None:
+            socket_server.close()
+        if spool_task is not None:
+            await spool_task
+        while self._pending:
+            await asyncio.sleep(0.1)
+        # Idle connections see EOF and their handlers return
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections)
+        if self._lock is not None:
+            # Left for recovery by the next server if anything is still claimed
+            with contextlib.suppress(OSError):
+                os.rmdir(self._spool_path("processing", self.server_id))
+            os.unlink(self._lock.name)
+            self._lock.close()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    async def prove(
+        self,
+        input_file: str,
+        file_id: str,
+        miner_address: str,
+        trace_path: T.Optional[str] = None,
+    ) -> ProofResponse:
+        config = dataclasses.replace(
+            self.config,
+            file_id=file_id,
+            miner_address=miner_address,
+            trace_path=trace_path,
+        )
+        async with self._slots:
+            try:
+                return await proof_async(input_file, self.proof_response, config)
+            finally:
+                if METRICS_PATH:
+                    REGISTRY.write(METRICS_PATH)
+
+    def _spool_path(self, subdir: str, name: str) -> str:
+        return os.path.join(self.spool_dir, subdir, name)
+
+    def _recover_spool(self) -> None:
+        for subdir in SPOOL_SUBDIRS:
+            os.makedirs(os.path.join(self.spool_dir, subdir), exist_ok=True)
+        # Held until the server stops, so peers sharing the spool know it is alive
+        self._lock = _try_lock(self._spool_path("processing", f"{self.server_id}.lock"))
+        if self._lock is None:
+            raise RuntimeError(f"Server {self.server_id} is already running")
+        # A previous run may have had the same ID, e.g. a restarted container
+        # running as PID 1 under the same hostname
+        if self._requeue(self.server_id):
+            logging.info(f"Recovered the archives of the previous run of {self.server_id}")
+        os.makedirs(self._spool_path("processing", self.server_id), exist_ok=True)
+
+        # Archives that servers were proving when they died are proven again
+        with os.scandir(os.path.join(self.spool_dir, "processing")) as entries:
+            server_ids = [
+                entry.name
+                for entry in entries
+                if entry.is_dir() and entry.name != self.server_id
+            ]
+        for server_id in server_ids:
+            lock = _try_lock(self._spool_path("processing", f"{server_id}.lock"))
+            if lock is None:
+                continue
+            with lock:
+                if not self._requeue(server_id):
+                    # Recovered by a peer in the meantime
+                    continue
+                os.unlink(lock.name)
+            logging.info(f"Recovered the archives of server {server_id}")
+
+    def _requeue(self, server_id: str) -> bool:
+        """
+        Moves the archives claimed by a server back to incoming/ and removes
+        its directory, the caller holds its lock. False when there is none.
+        """
+        claimed = self._spool_path("processing", server_id)
+        if not os.path.isdir(claimed):
+            return False
+        for name in os.listdir(claimed):
+            os.replace(os.path.join(claimed, name), self._spool_path("incoming", name))
+        os.rmdir(claimed)
+        return True
+
+    def _incoming(self) -> list[str]:
+        """Archives waiting in incoming/, oldest first."""
+        waiting = []
+        with os.scandir(os.path.join(self.spool_dir, "incoming")) as entries:
+            for entry in entries:
+                if (
+                    not entry.is_file()
+                    or entry.name.startswith(".")
+                    or entry.name.endswith(".tmp")
+                    or entry.name.endswith(JOB_SUFFIX)
+                ):
+                    continue
+                try:
+                    waiting.append((entry.stat().st_mtime, entry.name))
+                except FileNotFoundError:
+                    # Claimed by another server sharing the spool
+                    continue
+        return [name for _, name in sorted(waiting)]
+
+    async def _poll_spool(self) -> None:
+        jobs: set[asyncio.Task] = set()
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self._claim_incoming(jobs)
+            except Exception:
+                # Retried on the next poll, the server keeps claiming work
+                logging.exception(f"Failed to claim archives from {self.spool_dir}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), SPOOL_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        if jobs:
+            await asyncio.gather(*jobs)
+
+    def _claim_incoming(self, jobs: set[asyncio.Task]) -> None:
+        """Claims incoming archives while proof slots are free."""
+        for name in self._incoming():
+            if len(jobs) >= self.concurrency:
+                break
+            try:
+                os.rename(self._spool_path("incoming", name), self._claimed_path(name))
+            except FileNotFoundError:
+                # Claimed by another server sharing the spool
+                continue
+            try:
+                os.rename(
+                    self._spool_path("incoming", name + JOB_SUFFIX),
+                    self._claimed_path(name + JOB_SUFFIX),
+                )
+            except FileNotFoundError:
+                # Failed in _prove_spooled, rewards need the job's miner address
+                pass
+            job = asyncio.create_task(self._prove_spooled(name))
+            jobs.add(job)
+            job.add_done_callback(self._job_done(jobs))
+
+    def _job_done(self, jobs: set[asyncio.Task]) -> T.Callable[[asyncio.Task], None]:
+        def callback(job: asyncio.Task) -> None:
+            # A slot is free, claim the next archive right away
+            jobs.discard(job)
+            self._wake.set()
+
+        return callback
+
+    def _claimed_path(self, name: str) -> str:
+        return os.path.join(self.spool_dir, "processing", self.server_id, name)
+
+    async def _prove_spooled(self, name: str) -> None:
+        processing = self._claimed_path(name)
+        results = self._spool_path("results", name)
+        try:
+            if not os.path.exists(processing + JOB_SUFFIX):
+                raise ValueError(f"No {name}{JOB_SUFFIX} was spooled with the archive")
+            with open(processing + JOB_SUFFIX) as f:
+                job = check_job(json.load(f), f"{name}{JOB_SUFFIX}")
+            response = await self.prove(
+                processing,
+                job["file_id"],
+                job["miner_address"],
+                trace_path=f"{results}.trace.json" if self.config.trace_path else None,
+            )
+        except Exception as e:
+            logging.exception(f"Failed to generate proof for {name}")
+            write_json_atomic(f"{results}.results.json", {"error": str(e)})
+            self._finish_spooled(name, "failed")
+        else:
+            write_json_atomic(f"{results}.results.json", response.dict())
+            self._finish_spooled(name, "done")
+            logging.info(f"Proof generation complete for {name}: {response}")
+
+    def _finish_spooled(self, name: str, subdir: str) -> None:
+        os.replace(self._claimed_path(name), self._spool_path(subdir, name))
+        if os.path.exists(self._claimed_path(name + JOB_SUFFIX)):
+            os.replace(
+                self._claimed_path(name + JOB_SUFFIX),
+                self._spool_path(subdir, name + JOB_SUFFIX),
+            )
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = asyncio.current_task()
+        self._connections[connection] = writer
+        try:
+            while line := await reader.readline():
+                reply = await self._socket_job(line)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[connection]
+            writer.close()
+
+    async def _socket_job(self, line: bytes) -> dict[str, T.Any]:
+        if self._stopping.is_set():
+            return {"error": "Server is stopping"}
+        if self._pending >= self.max_pending:
+            return {"error": "Server is busy, retry later"}
+        try:
+            job = check_job(json.loads(line), "Job")
+            input_file = job["input_file"]
+        except (ValueError, KeyError, TypeError) as e:
+            return {"error": f"Invalid job: {e!r}"}
+        self._pending += 1
+        try:
+            response = await self.prove(input_file, job["file_id"], job["miner_address"])
+            return {"result": response.dict()}
+        except Exception as e:
+            logging.exception(f"Failed to generate proof for {input_file}")
+            return {"error": str(e)}
+        finally:
+            self._pending -= 1
+
+
+def _try_lock(path: str) -> T.Optional[T.TextIO]:
+    """Opens and locks the file, None when another process holds the lock."""
+    lock = open(path, "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+
+def write_json_atomic(path: str, data: T.Any) -> None:
+    """Replaces the file at `path` at once, readers never see a partial result."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
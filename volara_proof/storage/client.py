@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import gzip
+import json
+import os
+import random
+import time
+import typing as T
+import weakref
+
+import httpx
+
+from volara_proof.constants import (
+    VOLARA_API_URL,
+    VOLARA_API_POOL_SIZE,
+    VOLARA_API_CONNECT_TIMEOUT,
+    VOLARA_API_READ_TIMEOUT,
+    VOLARA_API_RETRIES,
+    VOLARA_API_BACKOFF_BASE,
+    VOLARA_API_BACKOFF_MAX,
+    VOLARA_API_GZIP_MIN_BYTES,
+)
+from volara_proof.metrics import API_REQUEST_SECONDS
+from volara_proof.tracing import record_http
+
+# Statuses for which the server did not act on the request
+RETRY_STATUSES_ANY = frozenset({429, 503})
+# Statuses that are only safe to retry for idempotent requests
+RETRY_STATUSES_IDEMPOTENT = RETRY_STATUSES_ANY | {500, 502, 504}
+
+
+def backoff_delays(retries: int = VOLARA_API_RETRIES) -> T.Iterator[float]:
+    """Bounded exponential backoff with full jitter."""
+    for attempt in range(retries):
+        yield random.uniform(0, min(VOLARA_API_BACKOFF_MAX, VOLARA_API_BACKOFF_BASE * 2**attempt))
+
+
+def encode_body(body: T.Any) -> tuple[bytes, dict[str, str]]:
+    """Encodes a JSON body, bytes are taken to be JSON already."""
+    if isinstance(body, bytes):
+        data = body
+    else:
+        data = json.dumps(body, separators=(",", ":")).encode()
+    headers = {"Content-Type": "application/json"}
+    if 0 < VOLARA_API_GZIP_MIN_BYTES <= len(data):
+        data = gzip.compress(data, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return data, headers
+
+
+def auth_headers() -> dict[str, str]:
+    return {"Authorization": f"Bearer {os.environ['VOLARA_API_KEY']}"}
+
+
+class VolaraApiClient:
+    """
+    Keep-alive connection pool to the Volara API shared by the storage classes.
+    Requests are retried on transient failures; non-idempotent requests only
+    when the server cannot have acted on them.
+
+    httpx pools are bound to an event loop, so one is kept per running loop.
+    """
+
+    def __init__(self, base_url: str = VOLARA_API_URL):
+        self.base_url = base_url
+        self._sessions: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def session(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None:
+            session = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=auth_headers(),
+                limits=httpx.Limits(
+                    max_connections=VOLARA_API_POOL_SIZE,
+                    max_keepalive_connections=VOLARA_API_POOL_SIZE,
+                ),
+                timeout=httpx.Timeout(
+                    VOLARA_API_READ_TIMEOUT, connect=VOLARA_API_CONNECT_TIMEOUT
+                ),
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def post(
+        self,
+        path: str,
+        body: T.Any,
+        idempotent: bool = True,
+        headers: T.Optional[dict[str, str]] = None,
+    ) -> T.Any:
+        data, body_headers = encode_body(body)
+        headers = body_headers | (headers or {})
+        retry_statuses = RETRY_STATUSES_IDEMPOTENT if idempotent else RETRY_STATUSES_ANY
+        retryable_errors = (
+            (httpx.TransportError,)
+            if idempotent
+            else (httpx.ConnectError, httpx.ConnectTimeout)
+        )
+        delays = backoff_delays()
+        while True:
+            start = time.perf_counter()
+            resp = None
+            try:
+                resp = await self.session.post(path, content=data, headers=headers)
+            except retryable_errors:
+                delay = next(delays, None)
+                if delay is None:
+                    raise
+            else:
+                delay = next(delays, None) if resp.status_code in retry_statuses else None
+                if delay is None:
+                    break
+            finally:
+                seconds = time.perf_counter() - start
+                status = resp.status_code if resp is not None else None
+                record_http("POST", path, status, seconds, len(data))
+                API_REQUEST_SECONDS.observe(seconds, path=path, status=status or "error")
+            await asyncio.sleep(delay)
+        resp.raise_for_status()
+        return resp.json()
+
+
+@functools.cache
+def get_api_client() -> VolaraApiClient:
+    return VolaraApiClient()
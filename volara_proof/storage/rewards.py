@@ -1,45 +1,93 @@
+import json
 import logging
-import os
-import requests
+import typing as T
 
-from volara_proof.models.tweet_info import TweetInfo
-from volara_proof.constants import VOLARA_API_URL
+from volara_proof.aio import run_sync
+from volara_proof.constants import REWARDS_PAGE_SIZE
+from volara_proof.metrics import REWARD_RECORDS
+from volara_proof.models.tweet_info import TweetInfo, TweetInfoBatch
+from volara_proof.storage.client import VolaraApiClient, get_api_client
 
 
-class RewardsStorage:
-    def post_rewards(
+class AsyncRewardsStorage:
+    def __init__(
+        self,
+        client: T.Optional[VolaraApiClient] = None,
+        page_size: int = REWARDS_PAGE_SIZE,
+    ):
+        self.client = client or get_api_client()
+        self.page_size = page_size
+
+    async def post_rewards(
         self,
         file_id: str,
         miner_address: str,
         file_score: float,
-        tweet_scores: list[TweetInfo],
+        tweet_scores: TweetInfoBatch | list[TweetInfo],
     ) -> None:
-        tweet_records = [
-            {
-                "tweetId": tweet_score.tweet_id,
-                "userId": tweet_score.user_id,
-                "ownershipScore": tweet_score.score,
-            }
-            for tweet_score in tweet_scores
-        ]
+        """
+        Submits the rewards in one request, or in pages of `page_size` records
+        when there are more. Every page carries the file ID and its index under
+        an idempotency key, so a failed page can be re-sent on its own.
+        """
+        if not isinstance(tweet_scores, TweetInfoBatch):
+            tweet_scores = TweetInfoBatch.from_infos(tweet_scores)
         request_body = {
             "fileId": file_id,
             "minerAddress": miner_address,
             "tweetCount": len(tweet_scores),
             "submissionScore": file_score,
-            "tweetRecords": tweet_records,
         }
         try:
-            resp = requests.post(
-                url=f"{VOLARA_API_URL}/v1/validator/submit-validation",
-                json=request_body,
-                headers={"Authorization": f"Bearer {os.environ['VOLARA_API_KEY']}"},
-            )
-            resp.raise_for_status()
+            if self.page_size <= 0 or len(tweet_scores) <= self.page_size:
+                resp = await self.client.post(
+                    "/v1/validator/submit-validation",
+                    _with_records(request_body, tweet_scores),
+                    idempotent=False,
+                )
+            else:
+                page_count = -(-len(tweet_scores) // self.page_size)
+                for page in range(page_count):
+                    records = tweet_scores[
+                        page * self.page_size : (page + 1) * self.page_size
+                    ]
+                    resp = await self.client.post(
+                        "/v1/validator/submit-validation",
+                        _with_records(
+                            request_body | {"page": page, "pageCount": page_count},
+                            records,
+                        ),
+                        headers={"Idempotency-Key": f"{file_id}:{page}"},
+                    )
+            REWARD_RECORDS.inc(len(tweet_scores))
             logging.info("Succesfully uploaded rewards to validator.")
-            return resp.json()
+            return resp
         except Exception:
             logging.exception(
                 "[CRITICAL FAILURE] Failed to upload rewards to the director."
             )
             raise
+
+
+def _with_records(request_body: dict[str, T.Any], records: TweetInfoBatch) -> bytes:
+    # The records are serialized straight from the batch columns
+    return (
+        json.dumps(request_body, separators=(",", ":"))[:-1]
+        + f',"tweetRecords":{records.records_json()}}}'
+    ).encode()
+
+
+class RewardsStorage:
+    def __init__(self, client: T.Optional[VolaraApiClient] = None, **kwargs):
+        self.storage = AsyncRewardsStorage(client, **kwargs)
+
+    def post_rewards(
+        self,
+        file_id: str,
+        miner_address: str,
+        file_score: float,
+        tweet_scores: TweetInfoBatch | list[TweetInfo],
+    ) -> None:
+        return run_sync(
+            self.storage.post_rewards(file_id, miner_address, file_score, tweet_scores)
+        )
@@ -0,0 +1,52 @@
+import functools
+import sqlite3
+import time
+import typing as T
+from dataclasses import dataclass
+
+from volara_proof.constants import SAMPLING_HISTORY_PATH
+
+
+@dataclass(frozen=True, slots=True)
+class ContributorHistory:
+    """Tweets of a contributor's past files that matched or did not match Twitter."""
+
+    verified: int = 0
+    mismatched: int = 0
+
+
+class SamplingHistory:
+    """On-disk sampling results per miner address, summed over all their files."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS contributors ("
+            "miner_address TEXT PRIMARY KEY, verified INTEGER, mismatched INTEGER, "
+            "updated_at REAL)"
+        )
+
+    def get(self, miner_address: str) -> ContributorHistory:
+        row = self.db.execute(
+            "SELECT verified, mismatched FROM contributors WHERE miner_address = ?",
+            (miner_address,),
+        ).fetchone()
+        return ContributorHistory(*row) if row else ContributorHistory()
+
+    def add(self, miner_address: str, verified: int, mismatched: int) -> None:
+        self.db.execute(
+            "INSERT INTO contributors VALUES (?, ?, ?, ?) ON CONFLICT (miner_address) "
+            "DO UPDATE SET verified = verified + excluded.verified, "
+            "mismatched = mismatched + excluded.mismatched, updated_at = excluded.updated_at",
+            (miner_address, verified, mismatched, time.time()),
+        )
+
+
+@functools.cache
+def get_sampling_history() -> T.Optional[SamplingHistory]:
+    if not SAMPLING_HISTORY_PATH:
+        return None
+    return SamplingHistory(SAMPLING_HISTORY_PATH)
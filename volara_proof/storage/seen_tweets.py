@@ -0,0 +1,105 @@
+import contextlib
+import fcntl
+import functools
+import logging
+import os
+import typing as T
+
+import numpy as np
+
+from volara_proof.constants import SEEN_TWEETS_DIR
+from volara_proof.models.tweet_info import TWEET_ID_DTYPE
+
+
+class SeenTweetIndex:
+    """
+    On-disk set of tweet IDs the Volara API already reported as not unique.
+
+    IDs live in a sorted, memory-mapped uint64 array plus an append-only log
+    of recent additions, which is merged into the array once it grows past a
+    fraction of it. Writers serialize on a lock file, readers do not lock.
+    """
+
+    def __init__(self, directory: str, compact_min: int = 1 << 16):
+        os.makedirs(directory, exist_ok=True)
+        self.sorted_path = os.path.join(directory, "seen.u64")
+        self.pending_path = os.path.join(directory, "pending.u64")
+        self.lock_path = os.path.join(directory, "lock")
+        self.compact_min = compact_min
+
+    def contains(self, tweet_ids: np.ndarray) -> np.ndarray:
+        seen = _sorted_contains(_map(self.sorted_path), tweet_ids)
+        pending = _read(self.pending_path)
+        if len(pending):
+            seen |= np.isin(tweet_ids, pending)
+        return seen
+
+    def add(self, tweet_ids: np.ndarray) -> None:
+        if len(tweet_ids) == 0:
+            return
+        with self._locked():
+            with open(self.pending_path, "ab") as f:
+                np.asarray(tweet_ids, dtype=TWEET_ID_DTYPE).tofile(f)
+            pending_count = os.path.getsize(self.pending_path) // TWEET_ID_DTYPE.itemsize
+            sorted_count = _count(self.sorted_path)
+            if pending_count >= max(self.compact_min, sorted_count // 8):
+                self._compact()
+
+    def compact(self) -> None:
+        with self._locked():
+            self._compact()
+
+    def _compact(self) -> None:
+        merged = np.union1d(_map(self.sorted_path), _read(self.pending_path))
+        temp_path = f"{self.sorted_path}.tmp"
+        merged.astype(TWEET_ID_DTYPE).tofile(temp_path)
+        os.replace(temp_path, self.sorted_path)
+        os.truncate(self.pending_path, 0)
+        logging.info(f"Compacted seen tweet index to {len(merged)} IDs.")
+
+    @contextlib.contextmanager
+    def _locked(self) -> T.Iterator[None]:
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@functools.cache
+def get_seen_tweet_index() -> T.Optional[SeenTweetIndex]:
+    if not SEEN_TWEETS_DIR:
+        return None
+    return SeenTweetIndex(SEEN_TWEETS_DIR)
+
+
+def _count(path: str) -> int:
+    try:
+        return os.path.getsize(path) // TWEET_ID_DTYPE.itemsize
+    except FileNotFoundError:
+        return 0
+
+
+def _map(path: str) -> np.ndarray:
+    # The sorted array is only ever replaced, never truncated, so mapping is safe
+    count = _count(path)
+    if count == 0:
+        return np.zeros(0, dtype=TWEET_ID_DTYPE)
+    return np.memmap(path, dtype=TWEET_ID_DTYPE, mode="r", shape=(count,))
+
+
+def _read(path: str) -> np.ndarray:
+    # Only whole records, a concurrent append may be half written
+    count = _count(path)
+    if count == 0:
+        return np.zeros(0, dtype=TWEET_ID_DTYPE)
+    return np.fromfile(path, dtype=TWEET_ID_DTYPE, count=count)
+
+
+def _sorted_contains(sorted_ids: np.ndarray, tweet_ids: np.ndarray) -> np.ndarray:
+    if len(sorted_ids) == 0:
+        return np.zeros(len(tweet_ids), dtype=bool)
+    positions = np.searchsorted(sorted_ids, tweet_ids)
+    positions[positions == len(sorted_ids)] = 0
+    return sorted_ids[positions] == tweet_ids
@@ -1,28 +1,75 @@
-import requests
-import os
+import asyncio
+import typing as T
+
+import numpy as np
 
 import volara_proof.exceptions
-from volara_proof.constants import VOLARA_API_URL
-from volara_proof.models.tweet_info import TweetInfo
+from volara_proof.aio import run_sync
+from volara_proof.constants import VOLARA_UNIQUE_CHUNK_SIZE, VOLARA_UNIQUE_CONCURRENCY
+from volara_proof.metrics import UNIQUE_LOOKUP_TWEETS
+from volara_proof.models.tweet_info import TweetInfo, id_strings
+from volara_proof.storage.client import VolaraApiClient, get_api_client
 
 
-class TweetInfoStorage:
-    def get_info(self, tweet_info: list[TweetInfo], file_id: str) -> list[bool]:
-        return self.get([tweet.tweet_id for tweet in tweet_info], file_id)
+class AsyncTweetInfoStorage:
+    def __init__(
+        self,
+        client: T.Optional[VolaraApiClient] = None,
+        chunk_size: int = VOLARA_UNIQUE_CHUNK_SIZE,
+        concurrency: int = VOLARA_UNIQUE_CONCURRENCY,
+    ):
+        self.client = client or get_api_client()
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
 
-    def get(self, tweet_ids: list[str], file_id: str) -> list[bool]:
+    async def get_info(self, tweet_info: list[TweetInfo], file_id: str) -> list[bool]:
+        return await self.get([tweet.tweet_id for tweet in tweet_info], file_id)
+
+    async def get(self, tweet_ids: list[str] | np.ndarray, file_id: str) -> list[bool]:
         """
         Returns a list of booleans indicating whether each tweet ID exists in the index.
+        The IDs are looked up in concurrent chunks, each retried on its own.
         """
         if len(tweet_ids) == 0:
             return []
+        if isinstance(tweet_ids, np.ndarray):
+            tweet_ids = id_strings(tweet_ids)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def lookup(chunk: list[str]) -> list[bool]:
+            async with semaphore:
+                resp = await self.client.post(
+                    "/v1/validator/unique",
+                    {"tweetIds": chunk, "fileId": file_id},
+                )
+            if len(resp) != len(chunk):
+                raise ValueError(
+                    f"Expected {len(chunk)} uniqueness results, got {len(resp)}"
+                )
+            return resp
+
         try:
-            resp = requests.post(
-                f"{VOLARA_API_URL}/v1/validator/unique",
-                json={"tweetIds": tweet_ids, "fileId": file_id},
-                headers={"Authorization": f"Bearer {os.environ['VOLARA_API_KEY']}"},
+            chunks = await asyncio.gather(
+                *(
+                    lookup(tweet_ids[i : i + self.chunk_size])
+                    for i in range(0, len(tweet_ids), self.chunk_size)
+                )
             )
-            resp.raise_for_status()
-            return [not unique for unique in resp.json()]
         except Exception as e:
             raise volara_proof.exceptions.VolaraApiServerException(e)
+        exists = [not unique for chunk in chunks for unique in chunk]
+        indexed = sum(exists)
+        UNIQUE_LOOKUP_TWEETS.inc(indexed, result="indexed")
+        UNIQUE_LOOKUP_TWEETS.inc(len(exists) - indexed, result="unique")
+        return exists
+
+
+class TweetInfoStorage:
+    def __init__(self, client: T.Optional[VolaraApiClient] = None, **kwargs):
+        self.storage = AsyncTweetInfoStorage(client, **kwargs)
+
+    def get_info(self, tweet_info: list[TweetInfo], file_id: str) -> list[bool]:
+        return run_sync(self.storage.get_info(tweet_info, file_id))
+
+    def get(self, tweet_ids: list[str] | np.ndarray, file_id: str) -> list[bool]:
+        return run_sync(self.storage.get(tweet_ids, file_id))
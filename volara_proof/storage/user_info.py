@@ -1,43 +1,47 @@
 import logging
-import os
-import requests
+import typing as T
 
+from volara_proof.aio import run_sync
 from volara_proof.models.user_data import UserData
-from volara_proof.constants import VOLARA_API_URL
+from volara_proof.storage.client import VolaraApiClient, get_api_client
 
 
-class UserInfoStorage:
-    def verify_user(self, user_info: UserData) -> bool:
+class AsyncUserInfoStorage:
+    def __init__(self, client: T.Optional[VolaraApiClient] = None):
+        self.client = client or get_api_client()
+
+    async def verify_user(self, user_info: UserData) -> bool:
         request_body = {
             "handle": user_info.handle,
             "walletAddress": user_info.wallet_address,
         }
         try:
-            resp = requests.post(
-                url=f"{VOLARA_API_URL}/v1/validator/validate-user",
-                json=request_body,
-                headers={"Authorization": f"Bearer {os.environ['VOLARA_API_KEY']}"},
-            )
-            resp.raise_for_status()
+            resp = await self.client.post("/v1/validator/validate-user", request_body)
             logging.info("Succesfully determined if user exists.")
-            return resp.json()["userValidated"]
+            return resp["userValidated"]
         except Exception:
             logging.exception("[CRITICAL FAILURE] Failed to determine if user exists.")
             raise
 
-    def process_profile(self, user_info: UserData) -> None:
+    async def process_profile(self, user_info: UserData) -> None:
         request_body = {
             "walletAddress": user_info.wallet_address,
         }
         try:
-            resp = requests.post(
-                url=f"{VOLARA_API_URL}/v1/validator/profile-processed",
-                json=request_body,
-                headers={"Authorization": f"Bearer {os.environ['VOLARA_API_KEY']}"},
-            )
-            resp.raise_for_status()
+            resp = await self.client.post("/v1/validator/profile-processed", request_body)
             logging.info("Succesfully processed profile.")
-            return resp.json()
+            return resp
         except Exception:
             logging.exception("[CRITICAL FAILURE] Failed to process profile.")
             raise
+
+
+class UserInfoStorage:
+    def __init__(self, client: T.Optional[VolaraApiClient] = None):
+        self.storage = AsyncUserInfoStorage(client)
+
+    def verify_user(self, user_info: UserData) -> bool:
+        return run_sync(self.storage.verify_user(user_info))
+
+    def process_profile(self, user_info: UserData) -> None:
+        return run_sync(self.storage.process_profile(user_info))
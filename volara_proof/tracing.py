@@ -0,0 +1,117 @@
+"""
+Per-stage timing of a proof. Stages are wrapped in `span` and HTTP calls are
+recorded with `record_http`, both into the Trace of the current context if
+there is one. Tasks and threads started from a traced proof inherit it.
+"""
+
+import contextlib
+import contextvars
+import json
+import time
+import typing as T
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class Span:
+    name: str
+    wall_seconds: float = 0.0
+    # CPU time of the whole process while the span was open
+    cpu_seconds: float = 0.0
+    bytes: int = 0
+    items: int = 0
+
+
+@dataclass
+class HttpCall:
+    method: str
+    path: str
+    # None when no response was received
+    status: T.Optional[int]
+    seconds: float
+    request_bytes: int = 0
+
+
+@dataclass
+class Trace:
+    spans: list[Span] = field(default_factory=list)
+    http_calls: list[HttpCall] = field(default_factory=list)
+
+    def summary(self) -> dict[str, T.Any]:
+        """Span totals by name plus HTTP totals, small enough for metadata."""
+        spans: dict[str, dict[str, float]] = {}
+        for span in self.spans:
+            totals = spans.setdefault(
+                span.name,
+                {"wall_seconds": 0.0, "cpu_seconds": 0.0, "bytes": 0, "items": 0},
+            )
+            totals["wall_seconds"] += span.wall_seconds
+            totals["cpu_seconds"] += span.cpu_seconds
+            totals["bytes"] += span.bytes
+            totals["items"] += span.items
+        return {
+            "spans": spans,
+            "http": {
+                "calls": len(self.http_calls),
+                "seconds": sum(call.seconds for call in self.http_calls),
+                "max_seconds": max((call.seconds for call in self.http_calls), default=0.0),
+            },
+        }
+
+    def to_dict(self) -> dict[str, T.Any]:
+        return {
+            "summary": self.summary(),
+            "spans": [asdict(span) for span in self.spans],
+            "http_calls": [asdict(call) for call in self.http_calls],
+        }
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+_current_trace: contextvars.ContextVar[T.Optional[Trace]] = contextvars.ContextVar(
+    "volara_proof_trace", default=None
+)
+
+
+@contextlib.contextmanager
+def tracing() -> T.Iterator[Trace]:
+    """Collects the spans and HTTP calls of the block into a new Trace."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, bytes: int = 0, items: int = 0) -> T.Iterator[Span]:
+    """
+    Times the block. Byte and item counts known only inside the block can be
+    set on the yielded Span.
+    """
+    result = Span(name, bytes=bytes, items=items)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield result
+    finally:
+        result.wall_seconds = time.perf_counter() - wall_start
+        result.cpu_seconds = time.process_time() - cpu_start
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(result)
+
+
+def record_http(
+    method: str,
+    path: str,
+    status: T.Optional[int],
+    seconds: float,
+    request_bytes: int = 0,
+) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.http_calls.append(HttpCall(method, path, status, seconds, request_bytes))